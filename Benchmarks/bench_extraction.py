@@ -0,0 +1,54 @@
+"""
+Benchmark of DOCX paragraph extraction for transcript cleaning.
+
+Compares loading the full python-docx object model (`Document(path)` and
+`doc.paragraphs[4:-1]`) with the streaming reader used by read_paragraphs(),
+on large synthetic transcripts. Reports wall time and peak traced memory and
+checks both paths return the same text.
+
+    python bench_extraction.py --paragraphs 5000 20000
+"""
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from synthetic import add_script_path, write_transcript
+
+add_script_path("Transcript Cleaning | Interview")
+from docx import Document
+from transcript_cleaning import read_paragraphs
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX paragraph extraction.")
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[2000, 10000], help="Transcript sizes to test.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.paragraphs:
+            path = os.path.join(tmp, f"transcript_{count}.docx")
+            write_transcript(path, count)
+
+            full, full_seconds, full_peak = measure(lambda: [p.text for p in Document(path).paragraphs[4:-1]])
+            streamed, stream_seconds, stream_peak = measure(lambda: sum(1 for _ in read_paragraphs(path)))
+            assert list(read_paragraphs(path)) == full, "extracted text differs"
+
+            print(f"{count} paragraphs ({os.path.getsize(path) / 1024:.0f} KB):")
+            print(f"  python-docx: {full_seconds:.3f}s, peak {full_peak / 1024 ** 2:.1f} MB")
+            print(f"    streaming: {stream_seconds:.3f}s, peak {stream_peak / 1024 ** 2:.1f} MB "
+                  f"({full_seconds / stream_seconds:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of transcript paragraph normalization.
+
+Compares the original per-paragraph steps (four re.sub calls, re.match with a
+pattern string and a name regex rebuilt for every paragraph) with the
+precompiled single-pass TranscriptNormalizer, on synthetic paragraphs in the
+"Speaker  MM:SS  speech" layout.
+
+    python bench_normalization.py --paragraphs 100000
+"""
+import re
+import time
+import argparse
+
+from synthetic import add_script_path, transcript_paragraphs
+
+add_script_path("Transcript Cleaning | Interview")
+from transcript_cleaning import TranscriptNormalizer
+
+def legacy_normalize(para_text, pid, name):
+    """The per-paragraph steps as they were before TranscriptNormalizer."""
+    para_text = para_text.strip()
+    if not para_text:
+        return None
+    para_text = re.sub(r'\s+', ' ', para_text)
+    para_text = re.sub(r'\n\s+', '\n', para_text)
+    para_text = re.sub(r'\s+\n', '\n', para_text)
+    para_text = re.sub(r'\n+', '\n', para_text)
+    match = re.match(r"^(.+?)\s+(\d{1,2}:\d{2}(?::\d{2})?)\s+(.*)$", para_text)
+    if not match:
+        return None
+    speaker, timestamp, speech = match.group(1), match.group(2), match.group(3)
+    speaker = pid if speaker != "Hoorad Abootalebi" else "Interviewer"
+    pattern = re.compile(r'\b' + re.escape(name.split()[0]) + r'(?:\s+' + re.escape(" ".join(name.split()[0][1:])) + r')?\b', re.IGNORECASE)
+    speech = pattern.sub(pid, speech)
+    parts = timestamp.split(':')
+    hour, minute, second = ([0] + parts) if len(parts) == 2 else parts
+    return {'speaker': speaker, 'time': f"{int(hour):02d}:{int(minute):02d}:{int(second):02d}", 'speech': speech}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript paragraph normalization.")
+    parser.add_argument('--paragraphs', type=int, default=100000, help="Number of synthetic paragraphs.")
+    args = parser.parse_args()
+
+    pid, name = "P001", "Alex Smith"
+    paragraphs = transcript_paragraphs(args.paragraphs, name)
+
+    start = time.perf_counter()
+    legacy = [legacy_normalize(p, pid, name) for p in paragraphs]
+    legacy_seconds = time.perf_counter() - start
+
+    normalizer = TranscriptNormalizer(pid, name)
+    start = time.perf_counter()
+    current = [normalizer.normalize(p) for p in paragraphs]
+    current_seconds = time.perf_counter() - start
+
+    assert legacy == current, "normalization output changed"
+    for label, seconds in (("legacy", legacy_seconds), ("single-pass", current_seconds)):
+        print(f"{label:>12}: {seconds:.3f}s total, {seconds / len(paragraphs) * 1e6:.2f} us/paragraph")
+    print(f"     speedup: {legacy_seconds / current_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
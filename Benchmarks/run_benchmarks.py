@@ -0,0 +1,261 @@
+"""
+End-to-end benchmark suite for the I-CLAIM pipelines, entirely offline.
+
+Each case runs on deterministic synthetic inputs (see synthetic.py) at one or
+more scales, in a fresh process, and records wall time, throughput, peak RSS
+and per-stage timings:
+
+- transcripts: process_transcript() on a large DOCX transcript, then save_docx / save_text;
+- survey: clean_and_split_codes() and count_code_frequencies_detailed() through
+  Parquet intermediates, plus the code co-occurrence tables;
+- codebook: loading and joining the code book, and inter-coder agreement;
+- generation: the threaded generation engine with retries and the job
+  manifest, against a latency-injecting fake backend instead of fal_client.
+
+Results can be saved as a baseline and later runs compared against it; any
+case slower (or hungrier) than the baseline beyond the tolerance is flagged
+and the exit status is 1.
+
+    python run_benchmarks.py --scales small medium --save-baseline
+    python run_benchmarks.py --scales small medium --report run.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import synthetic
+from synthetic import add_script_path
+
+# Multiplier applied to every case's base size
+SCALES = {"small": 1, "medium": 5, "large": 25}
+
+DEFAULT_BASELINE = os.path.join(synthetic.BENCHMARKS_DIR, "baselines.json")
+
+
+class Stages:
+    """Accumulates wall time per named stage."""
+
+    def __init__(self):
+        self.seconds = Counter()
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def bench_transcripts(workdir, scale, stage):
+    add_script_path("Transcript Cleaning | Interview")
+    from transcript_cleaning import process_transcript, save_docx, save_text
+
+    path = synthetic.write_transcript(synthetic.transcript_path(workdir), 2000 * scale)
+    stats = Counter()
+    with stage("process_transcript"):
+        entries = process_transcript(path, stats)
+    # Sub-stages reported by process_transcript itself
+    stage.seconds["process_transcript.parse"] += stats["parse_seconds"]
+    stage.seconds["process_transcript.clean"] += stats["clean_seconds"]
+    with stage("save_docx"):
+        save_docx(os.path.join(workdir, "cleaned.docx"), entries)
+    with stage("save_text"):
+        save_text(os.path.join(workdir, "cleaned.txt"), entries)
+    return len(entries)
+
+
+def bench_survey(workdir, scale, stage):
+    add_script_path("Code Exporting | Survey")
+    from preprocessing import clean_and_split_codes
+    from frequencies import count_code_frequencies_detailed
+    from cooccurrence import code_cooccurrence
+    from table_io import read_table, write_table
+
+    rows = 20000 * scale
+    sheet_path = os.path.join(workdir, "codes.parquet")
+    cleaned_path = os.path.join(workdir, "codes_quotes.parquet")
+    write_table(synthetic.code_sheet(rows), sheet_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with stage("clean_and_split_codes"):
+            clean_and_split_codes(sheet_path, cleaned_path)
+        with stage("count_code_frequencies_detailed"):
+            count_code_frequencies_detailed(cleaned_path, os.path.join(workdir, "frequencies.parquet"))
+    with stage("cooccurrence"):
+        code_cooccurrence(read_table(cleaned_path))
+    return rows
+
+
+def bench_codebook(workdir, scale, stage):
+    add_script_path("Code Exporting | Survey")
+    add_script_path("Qualitative Analysis | Focus Group")
+    from codebook import Codebook
+    from agreement import code_agreement
+
+    codes = 2000 * scale
+    dictionary, frequencies = synthetic.codebook_tables(codes)
+    dictionary_path = os.path.join(workdir, "Code Book(Dictionary).csv")
+    frequencies_path = os.path.join(workdir, "Code Book(Frequencies).csv")
+    dictionary.to_csv(dictionary_path, index=False)
+    frequencies.to_csv(frequencies_path, index=False)
+
+    with stage("load_codebook"):
+        codebook = Codebook.from_files(frequencies=frequencies_path, dictionary=dictionary_path)
+    with stage("join_codebook"):
+        joined = codebook.table("frequencies", "dictionary")
+    with stage("agreement"):
+        code_agreement(joined, resamples=1000, workers=1)
+    return codes
+
+
+def bench_generation(workdir, scale, stage):
+    add_script_path("Dataset Construction")
+    import random
+    from generation_engine import FakeBackend, run_generation
+    from job_manifest import JobManifest, ManifestWriter
+    from scheduler import RetryPolicy, ScheduledBackend
+
+    tasks = synthetic.generation_tasks(200 * scale)
+    backend = ScheduledBackend(
+        FakeBackend(latency=0.01, jitter=0.01, size=64 * 1024, throttle_rate=0.02, rng=random.Random(0)),
+        retry=RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.05, rng=random.Random(0)),
+    )
+    manifest = JobManifest(os.path.join(workdir, "manifest.sqlite"))
+    with stage("plan"):
+        manifest.add_tasks(tasks)
+    writer = ManifestWriter(workdir, manifest)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with stage("generate_and_write"):
+            for result in run_generation(tasks, backend, concurrency=8, on_submit=writer.dispatch):
+                writer.write(result)
+        with stage("export_csvs"):
+            writer.close()
+    manifest.close()
+    return len(tasks)
+
+
+CASES = {
+    "transcripts": bench_transcripts,
+    "survey": bench_survey,
+    "codebook": bench_codebook,
+    "generation": bench_generation,
+}
+
+
+def run_case(name, scale):
+    """Run one case in the current process and return its measurements."""
+    stage = Stages()
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        items = CASES[name](workdir, SCALES[scale], stage)
+        seconds = time.perf_counter() - start
+    # Setup (writing the synthetic inputs) is part of the case but not of any stage;
+    # dotted names are sub-stages of another stage
+    return {
+        "seconds": sum(seconds for key, seconds in stage.seconds.items() if "." not in key),
+        "total_seconds": seconds,
+        "items": items,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": dict(stage.seconds),
+    }
+
+
+def run_isolated(name, scale, repeat):
+    """Best of `repeat` runs of a case, each in a fresh process so peak RSS is its own."""
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            runs.append(pool.submit(run_case, name, scale).result())
+    best = min(runs, key=lambda run: run["seconds"])
+    best["throughput"] = best["items"] / best["seconds"] if best["seconds"] else None
+    best["peak_rss_mb"] = min(run["peak_rss_mb"] for run in runs)
+    return best
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Regression messages for every case slower or larger than its baseline beyond the tolerances."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                               f"(+{result['seconds'] / base['seconds'] - 1:.0%})")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_tolerance):
+            regressions.append(f"{key}: peak {result['peak_rss_mb']:.0f} MB vs baseline {base['peak_rss_mb']:.0f} MB")
+        for stage, seconds in result["stages"].items():
+            base_seconds = base.get("stages", {}).get(stage)
+            # Ignore stages too short to time reliably
+            if base_seconds and base_seconds > 0.05 and seconds > base_seconds * (1 + tolerance):
+                regressions.append(f"{key} [{stage}]: {seconds:.3f}s vs baseline {base_seconds:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES), help="Cases to run.")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=["small"], help="Input scales.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest is kept.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run's results as the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%).")
+    parser.add_argument('--memory-tolerance', type=float, default=0.2, help="Allowed peak RSS growth before flagging.")
+    parser.add_argument('--report', default=None, help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    for scale in args.scales:
+        for name in args.cases:
+            key = f"{name}/{scale}"
+            results[key] = result = run_isolated(name, scale, args.repeat)
+            stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["stages"].items())
+            print(f"{key:>22}: {result['seconds']:7.3f}s  {result['throughput']:10.1f} items/s  "
+                  f"peak {result['peak_rss_mb']:6.0f} MB  ({stages})")
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": report["machine"], "results": {**baseline, **results}}, f, indent=1)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    if baseline:
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Every generator takes a seed and returns the same data for the same
+arguments, so timings from different runs and machines compare like for like:
+
+- transcript_paragraphs / write_transcript: interview transcripts in the
+  "Speaker  MM:SS  speech" layout process_transcript() expects, named so
+  the PID and interviewee name are found in the path;
+- code_sheet: Ref./Code/Quote sheets with semicolon-joined codes, as
+  exported from the Zotero annotations;
+- codebook_tables: code book dictionary and per-coder frequency tables,
+  with case, spacing and punctuation variants between the two;
+- generation_tasks: face generation tasks for the fake image backend
+  (generation_engine.FakeBackend stands in for fal_client).
+"""
+import os
+import sys
+import random
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+WORDS = "security password phishing account data privacy you know like I think really bank email".split()
+INTERVIEWER = "Hoorad Abootalebi"
+CODERS = ["Hoorad", "Anam", "Joshua"]
+
+
+def add_script_path(folder):
+    """Make the scripts of a repo folder (e.g. 'Code Exporting | Survey') importable."""
+    path = os.path.join(REPO_DIR, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def transcript_paragraphs(count, name="Alex Smith", seed=0):
+    """Entry paragraphs alternating interviewer and interviewee, mentioning the name now and then."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(count):
+        speaker = INTERVIEWER if i % 2 == 0 else name
+        speech = " ".join(rng.choice(WORDS) for _ in range(40))
+        if i % 7 == 0:
+            speech += f" {name.split()[0]} mentioned it"
+        paragraphs.append(f"{speaker}   {i // 3600}:{i // 60 % 60:02d}:{i % 60:02d}\n  {speech}  ")
+    return paragraphs
+
+
+def transcript_path(directory, number=1, name="Alex Smith"):
+    """Path of a transcript laid out like the interview folders: P0NN/Interview P0NN - Name.docx."""
+    pid = f"P0{number:02d}"
+    return os.path.join(directory, pid, f"Interview {pid} - {name}.docx")
+
+
+def write_transcript(path, paragraphs, name="Alex Smith", seed=0):
+    """Write a synthetic transcript: four heading paragraphs, entries, one footer."""
+    from docx import Document
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc = Document()
+    for heading in ("Interview", "Date", "Attendees", "Transcript"):
+        doc.add_paragraph(heading)
+    for paragraph in transcript_paragraphs(paragraphs, name, seed):
+        doc.add_paragraph(paragraph)
+    doc.add_paragraph("Transcription ended")
+    doc.save(path)
+    return path
+
+
+def code_sheet(rows, papers=5000, codes=2000, seed=0):
+    """Ref./Code/Quote rows with one to three semicolon-joined codes each."""
+    rng = np.random.default_rng(seed)
+    refs = np.array([f"“Quote text.” (Author{i} et al., {2000 + i % 25}, p. {i % 300})" for i in range(papers)]
+                    + ["Reference without a year", None], dtype=object)
+    code_names = np.array([f"Code {i}" for i in range(codes)], dtype=object)
+    counts = rng.integers(1, 4, rows)
+    picks = code_names[rng.integers(0, codes, (rows, 3))]
+    df = pd.DataFrame({
+        "Ref.": refs[rng.integers(0, len(refs), rows)],
+        "Code": [" ; ".join(row[:count]) + ";" for row, count in zip(picks, counts)],
+        "Quote": [f"Quote text {i}." for i in range(rows)],
+    })
+    df.loc[::1000, "Code"] = None
+    return df
+
+
+def codebook_tables(codes, coders=CODERS, variant_rate=0.1, seed=0):
+    """
+    (dictionary, frequencies) DataFrames for `codes` codes. About
+    `variant_rate` of the dictionary entries are spelled differently from the
+    frequency table (case, spacing around parentheses, a trailing ';'), and a
+    few codes appear in only one of the two.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} code {i} ({rng.choice(WORDS)})" for i in range(codes)]
+    variants = []
+    for i, name in enumerate(names):
+        kind = rng.random()
+        if kind < variant_rate / 3:
+            name = name.upper()
+        elif kind < 2 * variant_rate / 3:
+            name = name.replace(" (", "(")
+        elif kind < variant_rate:
+            name = f"{name};"
+        variants.append(name)
+
+    dictionary = pd.DataFrame({"Code": variants, "Description": [f"Description of code {i}." for i in range(codes)]})
+    base = rng.poisson(3, (codes, 1))
+    counts = base + rng.poisson(1, (codes, len(coders))) * (rng.random((codes, len(coders))) < 0.5)
+    frequencies = pd.DataFrame(counts, columns=list(coders))
+    frequencies.insert(0, "Code", names)
+    return dictionary.iloc[: codes - codes // 50], frequencies.iloc[codes // 50:]
+
+
+def generation_tasks(count, expressions=4, seed=0):
+    """GenerationTask objects for `count` images, `expressions` per prompt."""
+    add_script_path("Dataset Construction")
+    from generation_engine import GenerationTask
+
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        pid = f"{i // expressions + 1:05d}"
+        prompt = " ".join(rng.choice(WORDS) for _ in range(30))
+        tasks.append(GenerationTask(pid, pid, int(pid), f"E{i % expressions + 1:02d}", prompt, "smiling"))
+    return tasks
@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Transcript Cleaning | Interview"))
+from docx_stream import UnsupportedDocument, iter_styled_paragraphs
+from table_io import write_table
+
+COLUMNS = ["Ref.", "Code", "Quote"]
+
+# Paragraph style -> column, as in word_to_excel.vb (any other style is a Quote)
+SKIP_STYLE = "heading 1"
+CODE_STYLE = "heading 2"
+REF_STYLE = "heading 3"
+
+
+def read_styled_paragraphs(file_path: str):
+    """
+    Streams (style name, text) for every body paragraph of a DOCX file,
+    falling back to python-docx for files the streaming reader cannot handle.
+    """
+    yielded = 0
+    try:
+        for paragraph in iter_styled_paragraphs(file_path):
+            yield paragraph
+            yielded += 1
+        return
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, UnsupportedDocument) as e:
+        print(f"⚠️ Falling back to python-docx for {file_path}: {type(e).__name__}: {e}")
+
+    from docx import Document
+    for para in Document(file_path).paragraphs[yielded:]:
+        yield (para.style.name if para.style is not None else None), para.text
+
+
+def extract_annotations(file_path: str) -> list:
+    """
+    Applies the rules of word_to_excel.vb to one Zotero annotation document:
+    every Heading 2 starts a new row holding the Code, a Heading 3 sets the
+    row's Ref., any other paragraph sets its Quote (the last one wins), and
+    Heading 1 is skipped. Text before the first Heading 2 is dropped, since
+    rows without a Code are removed by clean_and_split_codes anyway.
+    """
+    rows = []
+    row = None
+    for style, text in read_styled_paragraphs(file_path):
+        style = (style or "").lower()
+        if style == SKIP_STYLE:
+            continue
+        if style == CODE_STYLE:
+            row = {"Ref.": None, "Code": text, "Quote": None}
+            rows.append(row)
+        elif row is None:
+            continue
+        elif style == REF_STYLE:
+            row["Ref."] = text
+        else:
+            row["Quote"] = text
+    return rows
+
+
+def find_documents(paths: list) -> list:
+    """
+    Expands files and directories into the sorted list of annotation DOCX
+    files, skipping Word lock files ('~$...').
+    """
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            documents.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(".docx") and not name.startswith("~$")
+            ))
+        else:
+            documents.append(path)
+    return documents
+
+
+def export_annotations(paths: list, output_path: str, workers: int = None) -> pd.DataFrame:
+    """
+    Extracts the Ref./Code/Quote rows of many annotation documents in
+    parallel and writes them in one go, in document order, to the sheet
+    clean_and_split_codes reads (format picked by the output extension).
+    """
+    documents = find_documents(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(documents) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            per_document = list(pool.map(extract_annotations, documents,
+                                         chunksize=max(1, len(documents) // (workers * 4))))
+    else:
+        per_document = [extract_annotations(document) for document in documents]
+
+    df = pd.DataFrame([row for rows in per_document for row in rows], columns=COLUMNS)
+    write_table(df, output_path)
+
+    print(f"✅ Exported {len(df)} annotations from {len(documents)} documents to: {output_path}")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Zotero annotation Word files to a Ref./Code/Quote sheet.")
+    parser.add_argument("inputs", nargs="+", help="Annotation .docx files, or directories containing them.")
+    parser.add_argument("--output", default="Literature Review - Codes.xlsx",
+                        help="Ref./Code/Quote sheet; the extension picks the format (.xlsx, .csv, .parquet or .arrow).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    args = parser.parse_args()
+    export_annotations(args.inputs, args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
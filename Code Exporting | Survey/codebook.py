@@ -0,0 +1,221 @@
+import re
+import sys
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from table_io import load_table
+
+# Minimum trigram Dice similarity for two spellings to count as the same code
+FUZZY_THRESHOLD = 0.9
+
+_WHITESPACE = re.compile(r"\s+")
+_OPEN_PAREN = re.compile(r"\s*\(\s*")
+_CLOSE_PAREN = re.compile(r"\s*\)")
+_TRAILING_PUNCTUATION = re.compile(r"[\s;,.]+$")
+
+
+def normalize_code(code: str) -> str:
+    """
+    Canonical form of a code used as its index key: Unicode-normalized,
+    case-folded, whitespace collapsed, one space before '(' and none inside
+    the parentheses, and trailing ';', ',' or '.' removed. The result is
+    interned so equal codes share one string object.
+    """
+    code = unicodedata.normalize("NFKC", str(code)).casefold()
+    code = _WHITESPACE.sub(" ", code)
+    code = _OPEN_PAREN.sub(" (", code)
+    code = _CLOSE_PAREN.sub(")", code)
+    code = _TRAILING_PUNCTUATION.sub("", code).strip()
+    return sys.intern(code)
+
+
+def trigrams(key: str) -> set:
+    """Character trigrams of a normalized code, padded so short codes still have some."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CodeIndex:
+    """
+    Normalized codes -> integer ids, with a trigram inverted index for fuzzy
+    matching of spelling variants. Each id keeps the first spelling it was
+    seen with as its label.
+    """
+
+    def __init__(self, fuzzy_threshold: float = FUZZY_THRESHOLD):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ids = {}           # normalized code -> id
+        self.labels = []        # id -> first spelling seen
+        self.keys = []          # id -> normalized code
+        self.grams = []         # id -> trigram set
+        self.postings = {}      # trigram -> list of ids containing it
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, code: str) -> int:
+        """Id of `code`, creating a new entry if its normalized form is unknown."""
+        key = normalize_code(code)
+        code_id = self.ids.get(key)
+        if code_id is None:
+            code_id = len(self.labels)
+            self.ids[key] = code_id
+            self.labels.append(str(code).strip())
+            self.keys.append(key)
+            grams = trigrams(key)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(code_id)
+        return code_id
+
+    def find(self, code: str):
+        """Id of `code` on exact normalized match, else None."""
+        return self.ids.get(normalize_code(code))
+
+    def fuzzy(self, code: str, exclude=()):
+        """
+        Best fuzzy match of `code` by trigram Dice similarity.
+
+        Only ids sharing at least one trigram are scored, through the inverted
+        index. Ids in `exclude` are never returned.
+
+        Returns (id, score), with id None when nothing reaches the threshold.
+        """
+        grams = trigrams(normalize_code(code))
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best_id, best_score = None, 0.0
+        for code_id, overlap in shared.items():
+            if code_id in exclude:
+                continue
+            score = 2 * overlap / (len(grams) + len(self.grams[code_id]))
+            if score > best_score:
+                best_id, best_score = code_id, score
+        if best_score < self.fuzzy_threshold:
+            return None, best_score
+        return best_id, best_score
+
+
+class Codebook:
+    """
+    Dictionary, frequency, theme (or any other) code tables loaded once onto a
+    shared CodeIndex. Each table is stored keyed by code id, so joining any of
+    them onto a column of codes is an array lookup instead of a merge on raw
+    strings, and spelling variants across tables resolve to the same code.
+    """
+
+    def __init__(self, fuzzy_threshold: float = FUZZY_THRESHOLD):
+        self.index = CodeIndex(fuzzy_threshold)
+        self.tables = {}        # name -> DataFrame indexed by code id
+        self.matches = {}       # name -> DataFrame reporting how each code was resolved
+
+    @classmethod
+    def from_files(cls, fuzzy_threshold: float = FUZZY_THRESHOLD, **paths):
+        """
+        Loads each named table from a file (Excel, CSV, Parquet or Arrow) or a
+        DataFrame, e.g. Codebook.from_files(frequencies="...csv", dictionary="...csv").
+        """
+        codebook = cls(fuzzy_threshold)
+        for name, path in paths.items():
+            if isinstance(path, pd.DataFrame) or path:
+                codebook.load(name, load_table(path))
+        return codebook
+
+    def load(self, name: str, df: pd.DataFrame, code_column: str = "Code") -> pd.DataFrame:
+        """
+        Adds a table of per-code attributes. Each code resolves to an existing
+        entry on exact normalized match, then on fuzzy match against entries of
+        the other tables, and becomes a new entry otherwise. Rows of the same
+        code are combined: numbers summed, anything else first value kept.
+
+        Returns the match report, also kept in self.matches[name].
+        """
+        df = df.dropna(subset=[code_column])
+        resolved = {}
+        report = []
+        own_ids = set()
+        for code in pd.unique(df[code_column].astype(str)):
+            code_id = self.index.find(code)
+            kind, score = "exact", 1.0
+            if code_id is None:
+                code_id, score = self.index.fuzzy(code, exclude=own_ids)
+                kind = "fuzzy"
+                if code_id is None:
+                    code_id, kind = self.index.add(code), "new"
+            elif code != self.index.labels[code_id]:
+                kind = "normalized"
+            own_ids.add(code_id)
+            resolved[code] = code_id
+            report.append((code, self.index.labels[code_id], kind, score))
+
+        ids = df[code_column].astype(str).map(resolved).rename("Code ID")
+        values = df.drop(columns=[code_column])
+        numeric = values.select_dtypes("number").columns
+        aggregations = {column: ("sum" if column in numeric else "first") for column in values.columns}
+        self.tables[name] = values.groupby(ids.to_numpy()).agg(aggregations) if aggregations \
+            else pd.DataFrame(index=pd.Index(sorted(set(resolved.values()))))
+
+        self.matches[name] = pd.DataFrame(report, columns=["Code", "Matched Code", "Match", "Score"])
+        return self.matches[name]
+
+    def ids(self, codes) -> np.ndarray:
+        """Code ids of `codes` (exact normalized match), -1 where unknown."""
+        codes = pd.Series(codes, dtype=object).reset_index(drop=True)
+        present = codes.notna()
+        strings = codes[present].astype(str)
+        # Normalize each distinct spelling once, then map back onto every row
+        found = {code: self.index.find(code) for code in pd.unique(strings)}
+        ids = np.full(len(codes), -1, dtype=np.int64)
+        ids[present.to_numpy()] = strings.map(found).fillna(-1).to_numpy(dtype=np.int64)
+        return ids
+
+    def lookup(self, codes, name: str, columns=None) -> pd.DataFrame:
+        """Attributes from table `name` for each of `codes`, aligned with them (NaN where missing)."""
+        table = self.tables[name]
+        if columns is not None:
+            table = table[list(columns)]
+        result = table.reindex(self.ids(codes))
+        result.index = codes.index if isinstance(codes, pd.Series) else pd.RangeIndex(len(result))
+        return result
+
+    def join(self, df: pd.DataFrame, *names, code_column: str = "Code") -> pd.DataFrame:
+        """`df` with the columns of each named table looked up by its code column (a left join)."""
+        columns = [self.lookup(df[code_column], name).set_axis(df.index) for name in names]
+        return pd.concat([df, *columns], axis=1)
+
+    def table(self, *names) -> pd.DataFrame:
+        """
+        Every code present in any of the named tables (all tables by default),
+        with the columns of each, sorted by code (a full outer join).
+        """
+        names = names or tuple(self.tables)
+        ids = sorted(set().union(*(self.tables[name].index for name in names)),
+                     key=lambda code_id: self.index.labels[code_id])
+        columns = [self.tables[name].reindex(ids) for name in names]
+        result = pd.concat(columns, axis=1) if columns else pd.DataFrame(index=ids)
+        result.insert(0, "Code", [self.index.labels[code_id] for code_id in ids])
+        return result.reset_index(drop=True)
+
+    def unmatched(self, name: str, other: str) -> pd.Series:
+        """Codes of table `name` with no entry in table `other`."""
+        missing = self.tables[name].index.difference(self.tables[other].index)
+        return pd.Series([self.index.labels[code_id] for code_id in missing], name="Code", dtype=object)
+
+    def report(self) -> pd.DataFrame:
+        """
+        For every pair of tables, the codes present in one but not the other,
+        plus every code that was only joined through normalization or fuzzy matching.
+        """
+        rows = []
+        for name in self.tables:
+            for other in self.tables:
+                if other != name:
+                    rows.extend((name, code, f"missing from {other}", None) for code in self.unmatched(name, other))
+            matches = self.matches[name]
+            for code, matched, kind, score in matches[matches["Match"].isin(["normalized", "fuzzy"])].itertuples(index=False):
+                rows.append((name, code, f"{kind} match to '{matched}'", round(score, 3)))
+        return pd.DataFrame(rows, columns=["Table", "Code", "Issue", "Score"])
@@ -0,0 +1,122 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from table_io import read_table, write_tables
+
+DEFAULT_INPUT = "Literature Review - Codes & Quotes.parquet"  # written by preprocessing
+DEFAULT_OUTPUT = "Literature Review - Co-occurrence.parquet"
+
+# Columns identifying one coded unit: a quote within a paper, or a whole paper
+UNIT_COLUMNS = {"quote": ["Ref.", "Quote"], "paper": ["Ref."]}
+
+
+def incidence_matrix(df: pd.DataFrame, unit: str = "quote"):
+    """
+    Builds the sparse binary unit×code incidence matrix of a cleaned code table
+    (one row per Ref./Code/Quote, as written by clean_and_split_codes).
+    A code tagged twice on the same unit counts once.
+
+    Returns the CSR matrix and the codes labelling its columns.
+    """
+    df = df.dropna(subset=["Code"])
+    unit_ids = df.groupby(UNIT_COLUMNS[unit], dropna=False, sort=False).ngroup().to_numpy()
+    code_ids, codes = pd.factorize(df["Code"], sort=True)
+    incidence = sp.csr_matrix(
+        (np.ones(len(df), dtype=np.int32), (unit_ids, code_ids)),
+        shape=(unit_ids.max() + 1 if len(df) else 0, len(codes)),
+    )
+    # Duplicates were summed on construction; keep presence only
+    incidence.data[:] = 1
+    return incidence, pd.Index(codes, name="Code")
+
+
+def cooccurrence_pairs(incidence, codes: pd.Index, min_count: int = 1) -> pd.DataFrame:
+    """
+    Co-occurrence count, Jaccard and PMI of every pair of codes tagged on at
+    least `min_count` common units. Only the nonzero upper triangle of the
+    sparse code×code product is materialized, never a dense N×N matrix.
+    """
+    n_units = incidence.shape[0]
+    occurrences = np.asarray(incidence.sum(axis=0)).ravel()
+    pairs = sp.triu(incidence.T.tocsr() @ incidence, k=1).tocoo()
+
+    keep = pairs.data >= min_count
+    a, b, count = pairs.row[keep], pairs.col[keep], pairs.data[keep].astype(np.int64)
+    n_a, n_b = occurrences[a], occurrences[b]
+
+    result = pd.DataFrame({
+        "Code A": codes[a],
+        "Code B": codes[b],
+        "Count": count,
+        "Jaccard": count / (n_a + n_b - count),
+        "PMI": np.log(count * n_units / (n_a * n_b.astype(np.float64))),
+    })
+    return result.sort_values(["Count", "Code A", "Code B"], ascending=[False, True, True]).reset_index(drop=True)
+
+
+def top_neighbours(pairs: pd.DataFrame, k: int = 10, score: str = "Count") -> pd.DataFrame:
+    """
+    The `k` highest-scoring co-occurring codes of every code, ranked by
+    `score` ('Count', 'Jaccard' or 'PMI').
+    """
+    both_ways = pd.concat([
+        pairs,
+        pairs.rename(columns={"Code A": "Code B", "Code B": "Code A"}),
+    ], ignore_index=True).rename(columns={"Code A": "Code", "Code B": "Neighbour"})
+    both_ways = both_ways.sort_values(["Code", score, "Neighbour"], ascending=[True, False, True])
+    ranked = both_ways.groupby("Code", sort=False).head(k).copy()
+    ranked.insert(1, "Rank", ranked.groupby("Code", sort=False).cumcount() + 1)
+    return ranked[["Code", "Rank", "Neighbour", "Count", "Jaccard", "PMI"]].reset_index(drop=True)
+
+
+def code_cooccurrence(df: pd.DataFrame, unit: str = "quote", min_count: int = 1,
+                      top_k: int = 10, score: str = "Count") -> dict:
+    """
+    Co-occurrence sheets of a cleaned code table, keyed by sheet name.
+    """
+    incidence, codes = incidence_matrix(df, unit)
+    pairs = cooccurrence_pairs(incidence, codes, min_count)
+    return {"Co-occurrence": pairs, "Top Neighbours": top_neighbours(pairs, top_k, score)}
+
+
+def count_code_cooccurrence(input_path: str, output_path: str, unit: str = "quote", min_count: int = 1,
+                            top_k: int = 10, score: str = "Count", excel_path: str = None):
+    """
+    Reads the cleaned table (Excel, CSV, Parquet or Arrow), computes which codes
+    are tagged together on the same quote (or paper), and saves the pair table
+    and each code's top neighbours. Optionally also exports them to Excel.
+    """
+    df = read_table(input_path)
+    sheets = code_cooccurrence(df, unit, min_count, top_k, score)
+
+    write_tables(sheets, output_path)
+    if excel_path:
+        write_tables(sheets, excel_path)
+
+    print("\n🔹 Top co-occurring codes:")
+    print(sheets["Co-occurrence"].head(10))
+    print(f"\n✅ Results saved to: {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find codes tagged together on the same quote or paper.")
+    parser.add_argument("--input", default=DEFAULT_INPUT,
+                        help="Cleaned code table (.xlsx, .csv, .parquet or .arrow).")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="Co-occurrence tables; the extension picks the format.")
+    parser.add_argument("--unit", choices=sorted(UNIT_COLUMNS), default="quote",
+                        help="Codes co-occur when tagged on the same quote, or anywhere in the same paper.")
+    parser.add_argument("--min_count", type=int, default=1, help="Drop pairs co-occurring fewer times than this.")
+    parser.add_argument("--top_k", type=int, default=10, help="Neighbours listed per code.")
+    parser.add_argument("--score", choices=["Count", "Jaccard", "PMI"], default="Count",
+                        help="Score used to rank neighbours.")
+    parser.add_argument("--excel", default=None, help="Also export the co-occurrence tables to this Excel file.")
+    args = parser.parse_args()
+    count_code_cooccurrence(args.input, args.output, args.unit, args.min_count, args.top_k, args.score, args.excel)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,31 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
 
-def count_code_frequencies_detailed(input_path: str, output_path: str):
+from cooccurrence import code_cooccurrence
+from table_io import load_table, write_tables
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, start_run, timed
+
+DEFAULT_INPUT = "Literature Review - Codes & Quotes.parquet"
+DEFAULT_OUTPUT = "Literature Review - Frequencies.xlsx"
+
+@timed
+def count_code_frequencies_detailed(source, output_path: str = None, excel_path: str = None,
+                                    cooccurrence_unit: str = None) -> dict:
     """
-    Reads the cleaned Excel file, counts frequency of each code overall
-    and by each paper reference. Saves both to a new Excel file with two sheets.
+    Reads the cleaned table (Excel, CSV, Parquet or Arrow, or a DataFrame
+    already in memory), counts frequency of each code overall and by each paper
+    reference. Saves both to a new Excel file with two sheets, or to one file
+    per sheet for the other formats, when `output_path` is set.
+    With `cooccurrence_unit` ('quote' or 'paper'), the co-occurrence sheets
+    of cooccurrence.code_cooccurrence are added. Returns the sheets by name.
     """
     # Load the cleaned data
-    df = pd.read_excel(input_path)
+    df = load_table(source)
 
     # === Sheet 1: Overall frequency ===
     overall_freq = df["Code"].value_counts().reset_index()
@@ -23,22 +42,51 @@ def count_code_frequencies_detailed(input_path: str, output_path: str):
     # Reset index
     by_paper_freq = by_paper_freq.reset_index(drop=True)
 
-    # Write to Excel with two sheets
-    with pd.ExcelWriter(output_path) as writer:
-        overall_freq.to_excel(writer, sheet_name="Overall Frequency", index=False)
-        by_paper_freq.to_excel(writer, sheet_name="By Paper", index=False)
+    # Write both sheets, plus the Excel export if requested
+    sheets = {"Overall Frequency": overall_freq, "By Paper": by_paper_freq}
+    if cooccurrence_unit:
+        sheets.update(code_cooccurrence(df, unit=cooccurrence_unit))
+    if output_path:
+        write_tables(sheets, output_path)
+    if excel_path:
+        write_tables(sheets, excel_path)
 
     print("\n🔹 Top codes overall:")
     print(overall_freq.head(10))
     print(by_paper_freq.head(10))
-    print(f"\n✅ Results saved to: {output_path}")
+    if output_path:
+        print(f"\n✅ Results saved to: {output_path}")
+    return sheets
+
+
+
+def add_arguments(parser):
+    parser.add_argument("--input", default=None,
+                        help=f"Cleaned code table (.xlsx, .csv, .parquet or .arrow); defaults to the previous "
+                             f"pipeline stage's table, else '{DEFAULT_INPUT}'.")
+    parser.add_argument("--output", default=None,
+                        help=f"Frequency tables; the extension picks the format (default: '{DEFAULT_OUTPUT}', "
+                             f"not written when another pipeline stage follows).")
+    parser.add_argument("--excel", default=None, help="Also export the frequency tables to this Excel file.")
+    parser.add_argument("--cooccurrence", choices=["quote", "paper"], default=None,
+                        help="Also save code co-occurrence sheets, counting codes tagged on the same quote or paper.")
+    return parser
+
 
+def run(args, table=None, final=True):
+    """Run on parsed arguments; `table` is the output of the previous pipeline stage, if any."""
+    source = args.input or (table if table is not None else DEFAULT_INPUT)
+    output = args.output or (DEFAULT_OUTPUT if final else None)
+    return count_code_frequencies_detailed(source, output, args.excel, args.cooccurrence)
 
 
 def main():
-    input_file = "/home/ciber/Desktop/I-CLAIM/Code Exporting | Survey/Literature Review - Codes & Quotes.xlsx"
-    output_file = "Literature Review - Frequencies.xlsx"
-    count_code_frequencies_detailed(input_file, output_file)
+    parser = argparse.ArgumentParser(description="Count code frequencies overall and by paper.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run("frequencies", args.profile, args.profile_report)
+    run(args)
 
 
 if __name__ == "__main__":
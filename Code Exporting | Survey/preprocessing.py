@@ -1,54 +1,114 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-import re
 
-def clean_and_split_codes(input_path: str, output_path: str):
+from table_io import load_table, write_table
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, start_run, timed
+
+REF_PATTERN = r"\(([^,]+,\s*\d{4})"
+
+DEFAULT_INPUT = "Literature Review - Codes.xlsx"
+DEFAULT_OUTPUT = "Literature Review - Codes & Quotes.parquet"
+
+
+def extract_author_year(refs: pd.Series) -> pd.Series:
     """
-    Reads an Excel file, splits semicolon-separated codes into separate rows,
-    and writes the cleaned result to a new Excel file.
+    Reduces each reference to its (Author, Year) part.
+    The regex runs once per unique reference and is mapped back onto every row.
+    Non-string references and references without a year give None.
     """
-    # Load the Excel file
-    df = pd.read_excel(input_path)
+    unique_refs = pd.Series(refs.dropna().unique(), dtype=object)
+    unique_refs = unique_refs[unique_refs.map(type) == str]
+    author_year = "(" + unique_refs.astype(str).str.extract(REF_PATTERN, expand=False) + ")"
+    author_year = refs.map(pd.Series(author_year.to_numpy(dtype=object), index=unique_refs.to_numpy()))
+    return author_year.astype(object).where(author_year.notna(), None)
 
+
+def split_codes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Splits semicolon-separated codes into separate rows and keeps only
+    (Author, Year) in 'Ref.', using vectorized pandas string operations.
+    Empty codes are dropped, but a quote whose codes are all empty (e.g. ";")
+    keeps one row with a missing code.
+    """
     # Drop fully empty rows
     df = df.dropna(how="all")
 
     # Drop rows where 'Code' is missing
     df = df.dropna(subset=["Code"])
 
-    # Split, strip, and remove empty codes
-    df["Code"] = (
-        df["Code"]
-        .str.split(";")
-        .apply(lambda codes: [code.strip() for code in codes if code.strip()])
-    )
-
-    # Explode the cleaned list
-    df = df.explode("Code")
-    
-    # Clean the 'Ref.' field: keep only (Author, Year)
-    def extract_author_year(ref):
-        if not isinstance(ref, str):
-            return None
-        match = re.search(r"\(([^,]+,\s*\d{4})", ref)
-        return f"({match.group(1)})" if match else None
-
-    df["Ref."] = df["Ref."].apply(extract_author_year)
-    
-    # Reset index
+    # Clean the 'Ref.' field once per quote, before rows are multiplied
+    df = df.assign(**{"Ref.": extract_author_year(df["Ref."])})
+
+    # Split, explode and strip; the index still identifies the source quote
     df = df.reset_index(drop=True)
+    df = df.assign(Code=df["Code"].astype(str).str.split(";")).explode("Code")
+    codes = df["Code"].str.strip()
+
+    # Remove empty codes, keeping the first row of quotes that have no other code
+    empty = codes == ""
+    all_empty = empty.groupby(level=0).transform("all")
+    df = df.assign(Code=codes.where(~empty))
+    df = df[~empty | (all_empty & ~df.index.duplicated())]
+
+    # Reset index
+    return df.reset_index(drop=True)
+
+
+@timed
+def clean_and_split_codes(source, output_path: str = None, excel_path: str = None) -> pd.DataFrame:
+    """
+    Reads a code sheet (Excel, CSV, Parquet or Arrow, or a DataFrame already in
+    memory), splits semicolon-separated codes into separate rows, and writes the
+    cleaned result in the format given by the output extension when
+    `output_path` is set. Optionally also exports it to Excel. Returns the
+    cleaned table.
+    """
+    # Load the code sheet
+    df = load_table(source)
+
+    df = split_codes(df)
+
+    # Save the intermediate, and the Excel copy if requested
+    if output_path:
+        write_table(df, output_path)
+        print(f"✅ Cleaned data saved to: {output_path}")
+    if excel_path:
+        write_table(df, excel_path)
 
-    # Save to new Excel file
-    df.to_excel(output_path, index=False)
-    
-    print(f"✅ Cleaned data saved to: {output_path}")
     print(df.head(10))
+    return df
+
+
+def add_arguments(parser):
+    parser.add_argument("--input", default=None,
+                        help=f"Ref./Code/Quote sheet (.xlsx, .csv, .parquet or .arrow); defaults to the previous "
+                             f"pipeline stage's table, else '{DEFAULT_INPUT}'.")
+    parser.add_argument("--output", default=None,
+                        help=f"Cleaned table; the extension picks the format (default: '{DEFAULT_OUTPUT}', "
+                             f"not written when another pipeline stage follows).")
+    parser.add_argument("--excel", default=None, help="Also export the cleaned table to this Excel file.")
+    return parser
+
 
+def run(args, table=None, final=True):
+    """Run on parsed arguments; `table` is the output of the previous pipeline stage, if any."""
+    source = args.input or (table if table is not None else DEFAULT_INPUT)
+    output = args.output or (DEFAULT_OUTPUT if final else None)
+    return clean_and_split_codes(source, output, args.excel)
 
 
 def main():
-    input_file = "/home/ciber/Desktop/I-CLAIM/Code Exporting | Survey/Literature Review - Codes.xlsx"
-    output_file = "Literature Review - Codes & Quotes.xlsx"
-    clean_and_split_codes(input_file, output_file)
+    parser = argparse.ArgumentParser(description="Split semicolon-separated codes into one row per code.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run("split-codes", args.profile, args.profile_report)
+    run(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+import os
+import re
+
+import pandas as pd
+
+# Extensions of the columnar formats used for intermediates between stages
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def _extension(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+
+def read_table(path: str, **kwargs) -> pd.DataFrame:
+    """
+    Reads a table from Excel, CSV, Parquet or Arrow IPC, picked by file extension.
+    Parquet and Arrow files are memory-mapped instead of copied into memory first.
+    Extra keyword arguments go to the underlying pandas reader for Excel and CSV.
+    """
+    ext = _extension(path)
+    if ext in PARQUET_EXTENSIONS:
+        return pd.read_parquet(path, engine="pyarrow", memory_map=True)
+    if ext in ARROW_EXTENSIONS:
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).to_pandas()
+    if ext == ".csv":
+        return pd.read_csv(path, **kwargs)
+    if ext in EXCEL_EXTENSIONS:
+        return pd.read_excel(path, **kwargs)
+    raise ValueError(f"Unsupported table format: {path}")
+
+
+def load_table(source) -> pd.DataFrame:
+    """
+    The table itself when `source` is already a DataFrame (e.g. handed over by
+    the previous stage of a pipeline), otherwise read_table(source).
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    return read_table(source)
+
+
+def write_table(df: pd.DataFrame, path: str):
+    """
+    Writes a table to Excel, CSV, Parquet or Arrow IPC, picked by file extension.
+    Arrow files are written uncompressed so they can be memory-mapped without copying.
+    """
+    ext = _extension(path)
+    if ext in PARQUET_EXTENSIONS:
+        df.to_parquet(path, index=False)
+    elif ext in ARROW_EXTENSIONS:
+        df.reset_index(drop=True).to_feather(path, compression="uncompressed")
+    elif ext == ".csv":
+        df.to_csv(path, index=False)
+    elif ext in EXCEL_EXTENSIONS:
+        df.to_excel(path, index=False)
+    else:
+        raise ValueError(f"Unsupported table format: {path}")
+
+
+def sheet_path(path: str, sheet_name: str) -> str:
+    """
+    Path of one sheet of a multi-sheet table stored in a single-table format,
+    e.g. 'Frequencies.parquet' + 'By Paper' -> 'Frequencies - By Paper.parquet'.
+    """
+    stem, ext = os.path.splitext(path)
+    safe_name = re.sub(r"[^\w -]+", "_", sheet_name)
+    return f"{stem} - {safe_name}{ext}"
+
+
+def write_tables(sheets: dict, path: str):
+    """
+    Writes several named tables: as sheets of one workbook for Excel, or as one
+    file per sheet (see sheet_path) for CSV, Parquet and Arrow.
+    """
+    if _extension(path) in EXCEL_EXTENSIONS:
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+    else:
+        for sheet_name, df in sheets.items():
+            write_table(df, sheet_path(path, sheet_name))
+
+
+def read_tables(path: str, sheet_names: list) -> dict:
+    """Reads the named tables written by write_tables, in either layout."""
+    if _extension(path) in EXCEL_EXTENSIONS:
+        return pd.read_excel(path, sheet_name=list(sheet_names))
+    return {sheet_name: read_table(sheet_path(path, sheet_name)) for sheet_name in sheet_names}
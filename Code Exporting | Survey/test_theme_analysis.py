@@ -0,0 +1,17 @@
+import pandas as pd
+
+from theme_analysis import merge_themes
+
+
+def test_merge_keeps_frequency_order_and_rows():
+    frequencies = pd.DataFrame({
+        "Code": ["Code 2", "Code 10", "code 1", "Code 0", "Code 2"],
+        "Frequency": [50, 40, 30, 20, 10],
+    })
+    themes = pd.DataFrame({"Code": ["Code 0", "Code 1", "Code 2"], "Theme": ["A", "B", "C"]})
+
+    merged, _ = merge_themes(frequencies, themes)
+
+    assert merged["Code"].tolist() == frequencies["Code"].tolist()
+    assert merged["Frequency"].tolist() == [50, 40, 30, 20, 10]
+    assert merged["Theme"].fillna("").tolist() == ["C", "", "B", "A", "C"]
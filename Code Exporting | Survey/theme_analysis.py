@@ -1,15 +1,82 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
 
-# File paths (adjust as needed)
-code_frequency_path = "/mnt/data/code_frequency.csv"  # user-provided CSV file
-theme_mapping_path = "/mnt/data/code_theme_mapping.xlsx"  # user-provided Excel file
+from codebook import Codebook
+from table_io import load_table, write_table
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, start_run, timed
+
+# File paths (adjust as needed, or pass --frequencies / --themes)
+DEFAULT_FREQUENCIES = "code_frequency.csv"  # user-provided CSV, Excel, Parquet or Arrow file
+DEFAULT_THEMES = "code_theme_mapping.xlsx"  # user-provided CSV, Excel, Parquet or Arrow file
+DEFAULT_OUTPUT = "Code Frequency with Themes.csv"
+
+
+@timed
+def merge_themes(frequencies, themes):
+    """
+    Looks up the theme of every code, keeping all rows from the frequency data.
+    Both tables can be files (CSV, Excel, Parquet or Arrow) or DataFrames.
+    Returns the merged table and the codebook, whose report() lists codes
+    without a theme or only matched after normalization / fuzzy matching.
+    """
+    # Load the data onto one code index
+    frequency_df = load_table(frequencies)
+    codebook = Codebook.from_files(frequencies=frequency_df, themes=themes)
+    # Left-join onto the frequency table as loaded, so its row order and count are kept
+    merged_df = codebook.join(frequency_df, "themes")
+    return merged_df, codebook
+
+
+def add_arguments(parser):
+    parser.add_argument("--frequencies", default=None,
+                        help=f"Code frequency table; defaults to the previous pipeline stage's "
+                             f"'Overall Frequency' table, else '{DEFAULT_FREQUENCIES}'.")
+    parser.add_argument("--themes", default=DEFAULT_THEMES, help="Code -> theme mapping table.")
+    parser.add_argument("--output", default=None,
+                        help=f"Merged table; the extension picks the format (default: '{DEFAULT_OUTPUT}', "
+                             f"not written when another pipeline stage follows).")
+    parser.add_argument("--print", dest="print_report", action="store_true",
+                        help="Print every code without a theme or only matched after normalization / fuzzy matching.")
+    return parser
+
+
+def run(args, table=None, final=True):
+    """Run on parsed arguments; `table` is the output of the previous pipeline stage, if any."""
+    if isinstance(table, dict):
+        # The sheets of the frequencies stage
+        table = table.get("Overall Frequency")
+    frequencies = args.frequencies or (table if isinstance(table, pd.DataFrame) else DEFAULT_FREQUENCIES)
+    merged_df, codebook = merge_themes(frequencies, args.themes)
+
+    # Codes without a theme, or only matched after normalization / fuzzy matching
+    report = codebook.report()
+    if args.print_report:
+        print(report.to_string())
+    elif len(report):
+        print(f"{len(report)} codes without a theme or matched only approximately (--print to list them)")
+
+    output = args.output or (DEFAULT_OUTPUT if final else None)
+    if output:
+        write_table(merged_df, output)
+        print(f"✅ Merged code frequency with themes saved to: {output}")
+    else:
+        print(merged_df.head(10))
+    return merged_df
+
 
-# Load the data
-code_freq_df = pd.read_csv(code_frequency_path)
-theme_df = pd.read_excel(theme_mapping_path)
+def main():
+    parser = argparse.ArgumentParser(description="Look up the theme of every code in the code frequency table.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run("themes", args.profile, args.profile_report)
+    run(args)
 
-# Merge the two datasets on 'Code', keeping all rows from the frequency data
-merged_df = pd.merge(code_freq_df, theme_df, on='Code', how='left')
 
-# Show the result
-import ace_tools as tools; tools.display_dataframe_to_user(name="Merged Code Frequency with Themes", dataframe=merged_df)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Packed, indexed shard format for the generated face dataset.
+
+``prompts_script.py`` leaves one small ``E###.jpg`` per image in
+``SID…_PID…`` folders, with an ``expressions.csv`` per folder and one
+``prompts.csv``. Packing consolidates them into a few large files:
+
+    shard-00000.bin …   the JPEG bytes of every image, back to back
+    index.npy           one (shard, offset, length, phash, hashed, duplicate_of) row per image,
+                        memory-mapped for random access
+    records.csv         PID, SID, expression and near-duplicate flag of every image,
+                        in index order
+    prompts.csv         the prompts of the packed images
+    pack.json           format version and packing parameters
+
+Reading the dataset back (``ShardedDataset``) is then a handful of sequential
+reads instead of one open per image.
+
+While packing, a process pool computes a perceptual hash (DCT pHash) of every
+image. Images of the same seed whose hashes are within ``--threshold`` bits of
+an earlier one are flagged as near-duplicates: the expression prompt did not
+change the face enough, so the generation was redundant. An image that
+cannot be decoded is still packed, with a warning, but gets no hash and is
+never flagged.
+
+    python dataset_shards.py pack --model_dir ProjectRoot/FLUX --output ProjectRoot/FLUX-packed
+    python dataset_shards.py duplicates --pack ProjectRoot/FLUX-packed
+"""
+import io
+import os
+import csv
+import sys
+import json
+import mmap
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, metrics, start_run, timed
+
+PACK_VERSION = 2
+SHARD_SIZE_MB = 512
+# Hamming distance (of 64 bits) at or below which two images of one seed are near-duplicates
+DUPLICATE_THRESHOLD = 4
+
+HASH_SIZE = 8
+HASH_SAMPLE = 32            # images are reduced to HASH_SAMPLE x HASH_SAMPLE before the DCT
+
+INDEX_DTYPE = np.dtype([
+    ("shard", np.uint16),
+    ("offset", np.uint64),
+    ("length", np.uint32),
+    ("phash", np.uint64),
+    ("hashed", np.bool_),           # False when the image could not be decoded
+    ("duplicate_of", np.int64),     # record number of the earlier near-duplicate, -1 if none
+])
+RECORD_FIELDS = ["Record", "PID", "SID", "ExpressionID", "ExpressionText", "PHash", "DuplicateOf", "Distance"]
+
+
+def shard_name(number):
+    return f"shard-{number:05d}.bin"
+
+
+def list_images(model_dir):
+    """
+    (pid, sid, expression_id, expression_text, image path) of every image listed
+    in prompts.csv / expressions.csv and present on disk, in PID/expression order,
+    plus the prompt rows.
+    """
+    images, prompts = [], []
+    with open(os.path.join(model_dir, "prompts.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            pid, sid = row["PID"][1:], row["SID"][1:]
+            folder = os.path.join(model_dir, f"SID{sid}_PID{pid}")
+            expressions_csv_path = os.path.join(folder, "expressions.csv")
+            if not os.path.isfile(expressions_csv_path):
+                continue
+            prompts.append(row)
+            with open(expressions_csv_path, newline="", encoding="utf-8") as ef:
+                for expr in csv.DictReader(ef):
+                    image_path = os.path.join(folder, f"{expr['ExpressionID']}.jpg")
+                    if os.path.isfile(image_path):
+                        images.append((pid, sid, expr["ExpressionID"], expr["ExpressionText"], image_path))
+    return images, prompts
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+
+
+DCT = _dct_matrix(HASH_SAMPLE)
+
+
+def perceptual_hash(data):
+    """
+    64-bit DCT perceptual hash of an encoded image: the sign, against their
+    median, of the 8 x 8 lowest frequencies of the grayscale 32 x 32 thumbnail.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        # Let the JPEG decoder downscale while decoding instead of decoding at full size
+        image.draft("L", (HASH_SAMPLE * 2, HASH_SAMPLE * 2))
+        pixels = np.asarray(image.convert("L").resize((HASH_SAMPLE, HASH_SAMPLE), Image.LANCZOS), dtype=np.float64)
+    low = (DCT @ pixels @ DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low)
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hash_file(path):
+    """(hash, None) for an image file, or (None, error message) when it cannot be decoded."""
+    from PIL import UnidentifiedImageError
+
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return perceptual_hash(data), None
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def hamming(hashes, other):
+    """Bit differences between each of `hashes` (uint64 array) and the hash `other`."""
+    diff = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(other))
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+@timed
+def find_duplicates(sids, hashes, threshold=DUPLICATE_THRESHOLD, hashed=None):
+    """
+    Near-duplicates among images of the same seed. Images whose `hashed` flag
+    is False (undecodable) are neither flagged nor matched against.
+
+    Returns:
+        tuple: (duplicate_of, distance) arrays; each image points to the first
+        earlier image of its seed within `threshold` bits, -1 when there is none.
+    """
+    duplicate_of = np.full(len(hashes), -1, dtype=np.int64)
+    distance = np.full(len(hashes), -1, dtype=np.int64)
+    hashed = np.ones(len(hashes), dtype=bool) if hashed is None else np.asarray(hashed, dtype=bool)
+    groups = {}
+    for i, sid in enumerate(sids):
+        if hashed[i]:
+            groups.setdefault(sid, []).append(i)
+    for members in groups.values():
+        members = np.array(members)
+        for position in range(1, len(members)):
+            # Only compare against earlier images that are not duplicates themselves
+            earlier = members[:position][duplicate_of[members[:position]] < 0]
+            distances = hamming(hashes[earlier], hashes[members[position]])
+            close = np.flatnonzero(distances <= threshold)
+            if len(close):
+                duplicate_of[members[position]] = earlier[close[0]]
+                distance[members[position]] = distances[close[0]]
+    return duplicate_of, distance
+
+
+@timed
+def pack_dataset(model_dir, output_dir, shard_size_mb=SHARD_SIZE_MB, workers=None, threshold=DUPLICATE_THRESHOLD):
+    """
+    Pack every image of a generated dataset into shards with an offset index.
+
+    The pack is written next to `output_dir` and moved into place when
+    complete, replacing any previous pack; a failed pack leaves nothing behind.
+
+    Returns:
+        dict: Counts of images, shards, bytes, undecodable images and near-duplicates.
+    """
+    images, prompts = list_images(model_dir)
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        summary = _write_pack(model_dir, tmp_dir, images, prompts, shard_size_mb, workers, threshold)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return summary
+
+
+def _write_pack(model_dir, tmp_dir, images, prompts, shard_size_mb, workers, threshold):
+    """Write the shards, index, records and metadata of a pack into `tmp_dir`."""
+    index = np.zeros(len(images), dtype=INDEX_DTYPE)
+    shard_limit = int(shard_size_mb * 1024 ** 2)
+    shard, shard_bytes, shard_file = 0, 0, open(os.path.join(tmp_dir, shard_name(0)), "wb")
+    paths = [image[-1] for image in images]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Hashing runs in the pool while this process streams the bytes into the shards
+        hashes = pool.map(hash_file, paths, chunksize=64) if pool else map(hash_file, paths)
+        for i, (path, (phash, error)) in enumerate(zip(paths, hashes)):
+            if error is not None:
+                print(f"[WARN] Cannot decode {path} ({error}); packed without a perceptual hash.")
+            with open(path, "rb") as f:
+                data = f.read()
+            if shard_bytes and shard_bytes + len(data) > shard_limit:
+                shard_file.close()
+                shard, shard_bytes = shard + 1, 0
+                shard_file = open(os.path.join(tmp_dir, shard_name(shard)), "wb")
+            shard_file.write(data)
+            index[i] = (shard, shard_bytes, len(data), phash or 0, error is None, -1)
+            shard_bytes += len(data)
+    finally:
+        shard_file.close()
+        if pool:
+            pool.shutdown()
+
+    sids = [image[1] for image in images]
+    index["duplicate_of"], distance = find_duplicates(sids, index["phash"], threshold, index["hashed"])
+    np.save(os.path.join(tmp_dir, "index.npy"), index)
+
+    with open(os.path.join(tmp_dir, "records.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(RECORD_FIELDS)
+        for i, (pid, sid, expression_id, expression_text, _) in enumerate(images):
+            duplicate = int(index["duplicate_of"][i])
+            phash = f"{int(index['phash'][i]):016x}" if index["hashed"][i] else ""
+            writer.writerow([i, f"P{pid}", f"S{sid}", expression_id, expression_text, phash,
+                             "" if duplicate < 0 else duplicate, "" if duplicate < 0 else int(distance[i])])
+    with open(os.path.join(tmp_dir, "prompts.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["PID", "SID", "Prompt"], extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(prompts)
+
+    summary = {
+        "images": len(images),
+        "shards": shard + 1,
+        "bytes": int(index["length"].sum()),
+        "undecodable": int((~index["hashed"]).sum()),
+        "duplicates": int((index["duplicate_of"] >= 0).sum()),
+    }
+    with open(os.path.join(tmp_dir, "pack.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": PACK_VERSION, "source": os.path.abspath(model_dir), "shard_size_mb": shard_size_mb,
+                   "hash": f"dct{HASH_SIZE * HASH_SIZE}", "threshold": threshold, **summary}, f, indent=1)
+    return summary
+
+
+class ShardedDataset:
+    """
+    Random and sequential access to a packed dataset. The index and the shards
+    are memory-mapped; an image is copied out of its shard as bytes, so records
+    stay usable after close().
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        with open(os.path.join(pack_dir, "pack.json"), encoding="utf-8") as f:
+            self.info = json.load(f)
+        if self.info["version"] != PACK_VERSION:
+            raise ValueError(f"Unsupported pack version {self.info['version']} in {pack_dir}")
+        self.index = np.load(os.path.join(pack_dir, "index.npy"), mmap_mode="r")
+        with open(os.path.join(pack_dir, "records.csv"), newline="", encoding="utf-8") as f:
+            self.records = list(csv.DictReader(f))
+        with open(os.path.join(pack_dir, "prompts.csv"), newline="", encoding="utf-8") as f:
+            self.prompts = {row["PID"]: row["Prompt"] for row in csv.DictReader(f)}
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _shard(self, number):
+        if number not in self._shards:
+            with open(os.path.join(self.pack_dir, shard_name(number)), "rb") as f:
+                self._shards[number] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return self._shards[number]
+
+    def image(self, i):
+        """Encoded JPEG bytes of record `i`."""
+        shard, offset, length = int(self.index["shard"][i]), int(self.index["offset"][i]), int(self.index["length"][i])
+        return self._shard(shard)[offset:offset + length]
+
+    def __getitem__(self, i):
+        record = dict(self.records[i])
+        record["Prompt"] = self.prompts.get(record["PID"])
+        record["Image"] = self.image(i)
+        return record
+
+    def __iter__(self):
+        # Records are stored in shard/offset order, so iterating reads each shard front to back
+        for i in range(len(self)):
+            yield self[i]
+
+    def duplicates(self):
+        """Records flagged as near-duplicates of an earlier image of the same seed."""
+        return [record for record in self.records if record["DuplicateOf"]]
+
+    def close(self):
+        for shard in self._shards.values():
+            if isinstance(shard, mmap.mmap):
+                shard.close()
+        self._shards.clear()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Pack the generated face dataset into indexed shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="Pack a dataset and flag near-duplicate images.")
+    pack.add_argument('--model_dir', default=os.path.join("ProjectRoot", "FLUX"), help="Dataset folder with prompts.csv.")
+    pack.add_argument('--output', default=None, help="Pack folder (default: <model_dir>-packed).")
+    pack.add_argument('--shard_size_mb', type=float, default=SHARD_SIZE_MB, help="Target size of each shard.")
+    pack.add_argument('--workers', type=int, default=None, help="Hashing processes (default: one per CPU).")
+    pack.add_argument('--threshold', type=int, default=DUPLICATE_THRESHOLD,
+                      help="Maximum differing hash bits for two images of one seed to count as near-duplicates.")
+    add_profile_arguments(pack)
+    duplicates = commands.add_parser("duplicates", help="List the near-duplicates of a pack.")
+    duplicates.add_argument('--pack', default=os.path.join("ProjectRoot", "FLUX-packed"), help="Pack folder.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.command == "pack":
+        start_run("pack-dataset", args.profile, args.profile_report)
+        output = args.output or f"{args.model_dir.rstrip(os.sep)}-packed"
+        summary = pack_dataset(args.model_dir, output, args.shard_size_mb, args.workers, args.threshold)
+        metrics.update("pack", summary)
+        print(f"Packed {summary['images']} images ({summary['bytes'] / 1024 ** 2:.1f} MB) into "
+              f"{summary['shards']} shard(s) under {output}; {summary['duplicates']} near-duplicate(s) flagged, "
+              f"{summary['undecodable']} undecodable image(s).")
+        return
+
+    dataset = ShardedDataset(args.pack)
+    for record in dataset.duplicates():
+        original = dataset.records[int(record["DuplicateOf"])]
+        print(f"{record['PID']} {record['ExpressionID']} ~ {original['PID']} {original['ExpressionID']} "
+              f"({record['SID']}, {record['Distance']} bits)")
+    dataset.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Combinatorial feature sampler over face_features.json.
+
+Each combination of attribute values is encoded as one mixed-radix integer,
+so the whole Shape/Structure/Texture/Color space (far too large to enumerate)
+can be deduplicated with a plain set of ints that persists across runs.
+Sampling modes:
+
+- ``random``: independent uniform choice per attribute (the original behavior),
+  minus duplicates.
+- ``stratified``: every attribute draws its least-used value so far (ties
+  broken at random), which keeps the marginal coverage of every value within
+  one of each other, across runs as well.
+- ``halton``: a randomly shifted Halton low-discrepancy sequence, one prime
+  base per attribute. The shift and the next sequence index are saved next to
+  the seen-set, so a later run continues the same sequence.
+
+Generating N combinations is O(N) in time and memory.
+"""
+import hashlib
+import json
+import os
+import random
+from array import array
+
+MODES = ("random", "stratified", "halton")
+
+
+def _primes(count):
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def _radical_inverse(index, base):
+    result, fraction = 0.0, 1.0 / base
+    while index:
+        index, digit = divmod(index, base)
+        result += digit * fraction
+        fraction /= base
+    return result
+
+
+class FeatureSpace:
+    """Mixed-radix encoding of every (category, attribute) -> value choice."""
+
+    def __init__(self, data, categories):
+        self.categories = list(categories)
+        self.attributes = [(category, attribute, values)
+                           for category in self.categories
+                           for attribute, values in data[category].items()]
+        self.radices = [len(values) for _, _, values in self.attributes]
+        self.size = 1
+        for radix in self.radices:
+            self.size *= radix
+
+    @property
+    def fingerprint(self):
+        """Short hash of the layout; indices are only comparable within one layout."""
+        layout = json.dumps([[c, a, v] for c, a, v in self.attributes], ensure_ascii=False)
+        return hashlib.sha256(layout.encode("utf-8")).hexdigest()[:12]
+
+    def encode(self, digits):
+        index = 0
+        for digit, radix in zip(digits, self.radices):
+            index = index * radix + digit
+        return index
+
+    def digits(self, index):
+        digits = []
+        for radix in reversed(self.radices):
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+        return digits[::-1]
+
+    def decode(self, index):
+        """Return {category: {attribute: value}} for a combination index."""
+        features = {category: {} for category in self.categories}
+        for (category, attribute, values), digit in zip(self.attributes, self.digits(index)):
+            features[category][attribute] = values[digit]
+        return features
+
+
+class SeenSet:
+    """
+    Set of already-used combination indices, backed by an append-only file of
+    little-endian uint64 values (one per combination). Sampler state that must
+    survive between runs is kept in a JSON file next to it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.indices = set()
+        self.state = {}
+        if path and os.path.isfile(path):
+            values = array("Q")
+            with open(path, "rb") as f:
+                values.frombytes(f.read())
+            self.indices.update(values)
+        if path and os.path.isfile(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    @property
+    def state_path(self):
+        return f"{self.path}.json"
+
+    def __contains__(self, index):
+        return index in self.indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def add(self, index):
+        self.indices.add(index)
+
+    def save(self, new_indices, state=None):
+        """Append `new_indices` to the backing file and replace the saved sampler state."""
+        if self.path and new_indices:
+            with open(self.path, "ab") as f:
+                f.write(array("Q", new_indices).tobytes())
+        if self.path and state is not None:
+            self.state = state
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+
+
+class FeatureSampler:
+    """Draws combinations from a FeatureSpace that have not been drawn before."""
+
+    def __init__(self, space, mode="stratified", seen=None, rng=None, max_tries=1000):
+        if mode not in MODES:
+            raise ValueError(f"Unknown sampling mode {mode!r}; expected one of {MODES}")
+        self.space = space
+        self.mode = mode
+        self.seen = seen if seen is not None else SeenSet()
+        self.rng = rng or random.Random()
+        self.max_tries = max_tries
+        self.new_indices = []
+
+        if mode == "stratified":
+            # Start from the coverage of everything drawn in earlier runs
+            self.counts = [[0] * radix for radix in space.radices]
+            for index in self.seen.indices:
+                for counts, digit in zip(self.counts, space.digits(index)):
+                    counts[digit] += 1
+        elif mode == "halton":
+            # Resume the sequence of earlier runs: same shift, next unused index
+            self.bases = _primes(len(space.radices))
+            self.shift = self.seen.state.get("halton_shift") or [self.rng.random() for _ in space.radices]
+            self.halton_index = self.seen.state.get("halton_index", len(self.seen) + 1)
+
+    def _draw_digits(self, slack=0):
+        if self.mode == "random":
+            return [self.rng.randrange(radix) for radix in self.space.radices]
+        if self.mode == "stratified":
+            # `slack` widens the candidate values after a collision so a
+            # unique least-used combination cannot block sampling
+            digits = []
+            for counts in self.counts:
+                limit = min(counts) + slack
+                digits.append(self.rng.choice([d for d, c in enumerate(counts) if c <= limit]))
+            return digits
+        digits = []
+        for base, shift, radix in zip(self.bases, self.shift, self.space.radices):
+            u = (_radical_inverse(self.halton_index, base) + shift) % 1.0
+            digits.append(int(u * radix))
+        self.halton_index += 1
+        return digits
+
+    def sample_index(self):
+        """Return a fresh combination index and mark it as seen."""
+        for attempt in range(self.max_tries):
+            digits = self._draw_digits(slack=attempt)
+            index = self.space.encode(digits)
+            if index in self.seen:
+                continue
+            self.seen.add(index)
+            self.new_indices.append(index)
+            if self.mode == "stratified":
+                for counts, digit in zip(self.counts, digits):
+                    counts[digit] += 1
+            return index
+        raise RuntimeError(f"No unseen combination found after {self.max_tries} draws; "
+                           f"{len(self.seen)} of {self.space.size} combinations are used.")
+
+    def sample(self):
+        """Return a fresh combination as {category: {attribute: value}}."""
+        return self.space.decode(self.sample_index())
+
+    def commit(self):
+        """Persist combinations drawn since the last commit."""
+        state = None
+        if self.mode == "halton":
+            state = {"halton_shift": self.shift, "halton_index": self.halton_index}
+        self.seen.save(self.new_indices, state)
+        self.new_indices = []
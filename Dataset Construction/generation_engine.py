@@ -0,0 +1,145 @@
+"""
+Concurrent image-generation engine for the face dataset.
+
+Tasks are dispatched to a backend (anything exposing
+``generate(prompt, seed, timeout=None) -> bytes``) with a bounded number of requests in
+flight, so a run takes roughly as long as its slowest requests instead of the
+sum of all of them. Results are handed back in task order, which keeps
+the dataset layout deterministic.
+"""
+import hashlib
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class GenerationTask:
+    """One image to generate: a prompt (PID/SID) combined with one expression."""
+    pid: str                # zero-padded prompt number, e.g. "00003"
+    sid: str                # zero-padded seed, e.g. "004217"
+    seed: int
+    expression_id: str      # e.g. "E001"
+    prompt_text: str        # main description + base instruction
+    expression_text: str
+
+    @property
+    def final_prompt(self):
+        return f"{self.prompt_text} {self.expression_text}"
+
+    @property
+    def folder_name(self):
+        return f"SID{self.sid}_PID{self.pid}"
+
+
+@dataclass
+class GenerationResult:
+    task: GenerationTask
+    image: bytes = None
+    error: Exception = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class SimulatedError(Exception):
+    """Failure injected by FakeBackend, carrying an HTTP-like status code."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeBackend:
+    """
+    Local stand-in for Flux. Sleeps for a simulated queue/download latency and
+    returns bytes derived from (prompt, seed), so identical inputs give
+    identical output just like the real model. `failure_rate` and
+    `throttle_rate` inject server errors (500) and rate limiting (429).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, size=1024, failure_rate=0.0, throttle_rate=0.0, rng=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.size = size
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.rng = rng or random.Random()
+
+    def generate(self, prompt, seed, timeout=None):
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"simulated request took longer than {timeout:.1f}s")
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            raise SimulatedError("simulated rate limit", status_code=429)
+        if roll < self.throttle_rate + self.failure_rate:
+            raise SimulatedError("simulated server error", status_code=500)
+
+        digest = hashlib.sha256(f"{seed}:{prompt}".encode("utf-8")).digest()
+        return (digest * (self.size // len(digest) + 1))[:self.size]
+
+
+def _run_task(backend, task):
+    start = time.perf_counter()
+    try:
+        image = backend.generate(task.final_prompt, task.seed)
+        return GenerationResult(task, image=image, elapsed=time.perf_counter() - start)
+    except Exception as e:
+        return GenerationResult(task, error=e, elapsed=time.perf_counter() - start)
+
+
+def run_generation(tasks, backend, concurrency=4, on_submit=None):
+    """
+    Generate every task with at most `concurrency` backend calls in flight.
+
+    Args:
+        tasks (iterable): GenerationTask objects, in the order results should come out.
+        backend: Object with a ``generate(prompt, seed, timeout=None) -> bytes``
+            method; ScheduledBackend passes the time left to the backend it wraps.
+        concurrency (int): Maximum number of simultaneous backend calls.
+        on_submit (callable): Optional hook called with each task, from the
+            calling thread, right before it is dispatched.
+
+    Yields:
+        GenerationResult: One per task, in task order. Failed tasks carry the
+        exception in ``error`` instead of raising.
+    """
+    concurrency = max(1, int(concurrency))
+    tasks = iter(tasks)
+    pending = {}        # future -> task index
+    finished = {}       # task index -> result, waiting for earlier tasks
+    next_submit = 0
+    next_yield = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Keep a small backlog queued behind the workers so none of them idles,
+        # without materializing every task (and every image) up front.
+        def fill():
+            nonlocal next_submit
+            while len(pending) + len(finished) < 2 * concurrency:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                if on_submit is not None:
+                    on_submit(task)
+                pending[pool.submit(_run_task, backend, task)] = next_submit
+                next_submit += 1
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_yield in finished:
+                yield finished.pop(next_yield)
+                next_yield += 1
+            fill()
+
@@ -0,0 +1,136 @@
+"""
+Content-addressed cache for generated images.
+
+Flux is deterministic for a given (model, prompt, seed), so an image only ever
+needs to be paid for once. Blobs are stored once under ``objects/`` by the
+SHA-256 of their bytes, an SQLite index maps request keys to blobs, and the
+dataset folders receive hardlinks (copies when linking is not possible, e.g.
+across filesystems). The cache is bounded in size with LRU eviction; evicting
+a blob never touches the dataset's own link to it.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest    TEXT PRIMARY KEY,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    key    TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES blobs(digest)
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs(last_used);
+CREATE INDEX IF NOT EXISTS keys_digest ON keys(digest);
+"""
+
+
+def cache_key(model, prompt, seed):
+    """Hash of everything that determines the generated image."""
+    return hashlib.sha256(f"{model}\0{prompt}\0{int(seed)}".encode("utf-8")).hexdigest()
+
+
+def link_or_copy(source, dest):
+    """Atomically place `source` at `dest` as a hardlink, falling back to a copy."""
+    tmp_path = f"{dest}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+class ImageCache:
+    """Size-bounded, content-addressed image store with hit/miss statistics."""
+
+    def __init__(self, cache_dir, max_bytes=20 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0}
+
+    def close(self):
+        self.conn.close()
+
+    def blob_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def lookup(self, key):
+        """Return the blob path cached for `key`, or None, and count the hit or miss."""
+        row = self.conn.execute(
+            "SELECT k.digest, b.size FROM keys k JOIN blobs b USING (digest) WHERE k.key = ?", (key,)
+        ).fetchone()
+        if row is None or not os.path.isfile(self.blob_path(row[0])):
+            self.stats["misses"] += 1
+            return None
+        digest, size = row
+        with self.conn:
+            self.conn.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), digest))
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += size
+        return self.blob_path(digest)
+
+    def put(self, key, data):
+        """Store `data` under `key` (deduplicated by content) and return its blob path."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        with self.conn:
+            known = self.conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if known is None or not os.path.isfile(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                if known is None:
+                    self.total_bytes += len(data)
+                self.stats["stored"] += 1
+            self.conn.execute("INSERT OR REPLACE INTO blobs (digest, size, last_used) VALUES (?, ?, ?)",
+                              (digest, len(data), time.time()))
+            self.conn.execute("INSERT OR REPLACE INTO keys (key, digest) VALUES (?, ?)", (key, digest))
+        # The caller is about to link the new blob into the dataset, so it must survive eviction
+        self.evict(keep=digest)
+        return path
+
+    def evict(self, keep=None):
+        """
+        Drop least recently used blobs once the cache exceeds `max_bytes`,
+        down to 90% of it so eviction does not run again on every put. The
+        blob `keep` (a digest) is never dropped.
+        """
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = 0.9 * self.max_bytes
+        rows = self.conn.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall()
+        with self.conn:
+            for digest, size in rows:
+                if self.total_bytes <= target:
+                    break
+                if digest == keep:
+                    continue
+                self.conn.execute("DELETE FROM keys WHERE digest = ?", (digest,))
+                self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                self.total_bytes -= size
+                self.stats["evicted"] += 1
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (f"Cache: {self.stats['hits']} hits, {self.stats['misses']} misses ({hit_rate:.0%} hit rate), "
+                f"{self.stats['stored']} stored, {self.stats['evicted']} evicted, "
+                f"{self.stats['bytes_saved'] / 1024 ** 2:.1f} MB not re-downloaded, "
+                f"{self.total_bytes / 1024 ** 2:.1f} MB in cache")
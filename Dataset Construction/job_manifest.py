@@ -0,0 +1,231 @@
+"""
+Crash-safe job manifest for face dataset generation.
+
+Every (PID, SID, expression) image is a row in a small SQLite database with a
+state of pending, in_flight, done or failed. The manifest, not the folder
+layout, is the source of truth: resuming a run only re-dispatches unfinished
+rows, and ``prompts.csv`` / ``expressions.csv`` are rendered from it so they
+never list an image that does not exist.
+"""
+import csv
+import os
+import sqlite3
+import time
+
+from generation_engine import GenerationTask
+from image_cache import cache_key, link_or_copy
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    pid         TEXT PRIMARY KEY,
+    sid         TEXT NOT NULL,
+    seed        INTEGER NOT NULL,
+    prompt_text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    pid             TEXT NOT NULL REFERENCES prompts(pid),
+    expression_id   TEXT NOT NULL,
+    expression_text TEXT NOT NULL,
+    state           TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    error           TEXT,
+    updated_at      REAL,
+    PRIMARY KEY (pid, expression_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks(state);
+"""
+
+
+def atomic_write_bytes(path, data):
+    """Write `data` to a temp file next to `path`, then rename it into place."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_csv(path, header, rows):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+class JobManifest:
+    """SQLite-backed record of every generation task and its state."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM prompts LIMIT 1").fetchone() is None
+
+    def next_index(self):
+        """Return the next unused prompt number."""
+        row = self.conn.execute("SELECT MAX(CAST(pid AS INTEGER)) FROM prompts").fetchone()
+        return (row[0] or 0) + 1
+
+    def add_tasks(self, tasks, state=PENDING):
+        with self.conn:
+            for task in tasks:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO prompts (pid, sid, seed, prompt_text) VALUES (?, ?, ?, ?)",
+                    (task.pid, task.sid, task.seed, task.prompt_text),
+                )
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO tasks (pid, expression_id, expression_text, state, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (task.pid, task.expression_id, task.expression_text, state, time.time()),
+                )
+
+    def unfinished(self):
+        """Return every task that is not done, in PID/expression order."""
+        rows = self.conn.execute(
+            "SELECT p.pid, p.sid, p.seed, t.expression_id, p.prompt_text, t.expression_text "
+            "FROM tasks t JOIN prompts p USING (pid) "
+            "WHERE t.state != ? ORDER BY t.pid, t.expression_id",
+            (DONE,),
+        )
+        return [GenerationTask(*row) for row in rows]
+
+    def mark(self, task, state, error=None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tasks SET state = ?, error = ?, updated_at = ?, "
+                "attempts = attempts + (? = 'in_flight') "
+                "WHERE pid = ? AND expression_id = ?",
+                (state, None if error is None else str(error), time.time(), state,
+                 task.pid, task.expression_id),
+            )
+
+    def counts(self):
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state")
+        return dict(rows.fetchall())
+
+    def import_legacy(self, model_dir):
+        """
+        One-time import of a dataset written before the manifest existed. Rows
+        whose image is on disk are marked done, the rest failed so that
+        ``--resume`` picks them up.
+        """
+        prompts_csv_path = os.path.join(model_dir, "prompts.csv")
+        if not os.path.isfile(prompts_csv_path):
+            return 0
+        tasks_by_state = {DONE: [], FAILED: []}
+        with open(prompts_csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                pid, sid = row["PID"][1:], row["SID"][1:]
+                folder = os.path.join(model_dir, f"SID{sid}_PID{pid}")
+                expressions_csv_path = os.path.join(folder, "expressions.csv")
+                if not os.path.isfile(expressions_csv_path):
+                    continue
+                with open(expressions_csv_path, newline="", encoding="utf-8") as ef:
+                    for expr in csv.DictReader(ef):
+                        task = GenerationTask(pid, sid, int(sid), expr["ExpressionID"],
+                                              row["Prompt"], expr["ExpressionText"])
+                        exists = os.path.isfile(os.path.join(folder, f"{task.expression_id}.jpg"))
+                        tasks_by_state[DONE if exists else FAILED].append(task)
+        for state, tasks in tasks_by_state.items():
+            self.add_tasks(tasks, state=state)
+        return sum(len(tasks) for tasks in tasks_by_state.values())
+
+    def export_csvs(self, model_dir, pids=None):
+        """
+        Render ``prompts.csv`` and the ``expressions.csv`` of the given PIDs
+        (all PIDs when None) from done tasks only.
+        """
+        prompt_rows = self.conn.execute(
+            "SELECT p.pid, p.sid, p.prompt_text FROM prompts p WHERE EXISTS "
+            "(SELECT 1 FROM tasks t WHERE t.pid = p.pid AND t.state = ?) ORDER BY p.pid",
+            (DONE,),
+        ).fetchall()
+        _atomic_write_csv(
+            os.path.join(model_dir, "prompts.csv"),
+            ["PID", "SID", "Prompt"],
+            ([f"P{pid}", f"S{sid}", text] for pid, sid, text in prompt_rows),
+        )
+
+        for pid, sid, _ in prompt_rows:
+            if pids is not None and pid not in pids:
+                continue
+            expr_rows = self.conn.execute(
+                "SELECT expression_id, expression_text FROM tasks "
+                "WHERE pid = ? AND state = ? ORDER BY expression_id",
+                (pid, DONE),
+            )
+            folder = os.path.join(model_dir, f"SID{sid}_PID{pid}")
+            _atomic_write_csv(os.path.join(folder, "expressions.csv"),
+                              ["ExpressionID", "ExpressionText"], expr_rows)
+
+
+class ManifestWriter:
+    """
+    Writes finished images atomically and records each outcome in the manifest.
+    With an ImageCache, images are stored in the cache and hardlinked into the
+    dataset, and tasks already in the cache never reach the backend.
+    """
+
+    def __init__(self, model_dir, manifest, cache=None, model=None):
+        self.model_dir = model_dir
+        self.manifest = manifest
+        self.cache = cache
+        self.model = model
+        self.touched = set()
+
+    def _image_path(self, task):
+        prompt_folder = os.path.join(self.model_dir, task.folder_name)
+        os.makedirs(prompt_folder, exist_ok=True)
+        return os.path.join(prompt_folder, f"{task.expression_id}.jpg")
+
+    def from_cache(self, task):
+        """Materialize `task` from the cache; return True if it needs no generation."""
+        if self.cache is None:
+            return False
+        blob = self.cache.lookup(cache_key(self.model, task.final_prompt, task.seed))
+        if blob is None:
+            return False
+        link_or_copy(blob, self._image_path(task))
+        self.manifest.mark(task, DONE)
+        self.touched.add(task.pid)
+        return True
+
+    def uncached(self, tasks):
+        """Yield only the tasks that still have to be generated."""
+        return (task for task in tasks if not self.from_cache(task))
+
+    def dispatch(self, task):
+        self.manifest.mark(task, IN_FLIGHT)
+
+    def write(self, result):
+        task = result.task
+        if result.ok:
+            image_path = self._image_path(task)
+            if self.cache is not None:
+                blob = self.cache.put(cache_key(self.model, task.final_prompt, task.seed), result.image)
+                link_or_copy(blob, image_path)
+            else:
+                atomic_write_bytes(image_path, result.image)
+            self.manifest.mark(task, DONE)
+            self.touched.add(task.pid)
+        else:
+            self.manifest.mark(task, FAILED, result.error)
+            print(f"[ERROR] Prompt {task.pid} Expr {task.expression_id}: {result.error}")
+
+    def close(self):
+        self.manifest.export_csvs(self.model_dir, pids=self.touched)
@@ -1,6 +1,13 @@
-import os, csv, json, random, requests
-import fal_client
-from fal_client import InProgress
+import os, sys, json, random, argparse, time
+
+from generation_engine import GenerationTask, FakeBackend, run_generation
+from job_manifest import JobManifest, ManifestWriter
+from image_cache import ImageCache
+from feature_sampler import MODES, FeatureSpace, FeatureSampler, SeenSet
+from scheduler import RetryPolicy, TokenBucket, CircuitBreaker, ScheduledBackend
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, metrics, start_run, timed, timer
 
 
 # 1) Configs & Paths (unchanged) ...
@@ -8,14 +15,36 @@ MODEL_ID = "FLUX"
 OUTPUT_ROOT = "ProjectRoot"
 NUM_PROMPTS = 2
 NUM_EXPRESSIONS = 5
+CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+REQUESTS_PER_MINUTE = 60
+TASK_TIMEOUT = 600           # seconds per image, retries included
+DOWNLOAD_TIMEOUT = 30
+QUEUE_POLL_INTERVAL = 1.0
+CACHE_DIR = os.path.join(OUTPUT_ROOT, "cache")
+CACHE_SIZE_GB = 20
 SEED_PAD = 6
 PROMPT_PAD = 5
 EXPR_PAD = 3
 FAL_MODEL = "fal-ai/flux-pro/v1.1-ultra"
 
-# 2) Load face_features.json (unchanged) ...
-with open("face_features.json", "r") as file:
-    data = json.load(file)
+# 2) face_features.json, read on first use (or from --features) ...
+FEATURES_PATH = "face_features.json"
+data = None
+
+
+def load_features(path=FEATURES_PATH):
+    """Read the face feature lists used by every prompt."""
+    global data
+    with open(path, "r") as file:
+        data = json.load(file)
+    return data
+
+
+def face_features():
+    return data if data is not None else load_features()
+
+MAIN_CATEGORIES = ["Shape", "Structure", "Texture & Features", "Color"]
 
 # 3) Base instruction (unchanged) ...
 base_instruction = (
@@ -32,11 +61,14 @@ def zero_pad(num, length):
 def get_random_features(feature_dict):
     return {k: random.choice(v) for k, v in feature_dict.items()}
 
-def generate_main_description():
-    shape = get_random_features(data["Shape"])
-    structure = get_random_features(data["Structure"])
-    texture = get_random_features(data["Texture & Features"])
-    color = get_random_features(data["Color"])
+def generate_main_description(features=None):
+    """Describe a face from sampled `features` ({category: {attribute: value}}), or random ones."""
+    if features is None:
+        features = {category: get_random_features(face_features()[category]) for category in MAIN_CATEGORIES}
+    shape = features["Shape"]
+    structure = features["Structure"]
+    texture = features["Texture & Features"]
+    color = features["Color"]
     desc = (
         f"The subject's facial features are characterized by a {shape['Face']} face shape, "
         f"{shape['Eye']} eyes, and {shape['Eyebrow']} eyebrows, complemented by a {shape['Nose']} nose, "
@@ -49,27 +81,21 @@ def generate_main_description():
     )
     return desc
 
-def generate_expression_description():
-    expression = get_random_features(data["Expression"])
+def generate_expression_description(expression=None):
+    if expression is None:
+        expression = get_random_features(face_features()["Expression"])
     return (
         f"The expression includes {expression['Eye']} eyes, "
         f"{expression['Eyebrow']} eyebrows, and {expression['Lips']} lips."
     )
 
-def next_pid(csv_path: str, pad: int = 5) -> str:
-    """Return a zero‑padded PID that has never been used before."""
-    if not os.path.isfile(csv_path):
-        return zero_pad(1, pad)
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        rows = sum(1 for _ in f) - 1      # minus header
-    return zero_pad(rows + 1, pad)
-
-
 def on_queue_update(update):
     """
     Callback if you want to see progress logs from fal_client.
     This will only print if `update.logs` is a non‑empty iterable of dicts.
     """
+    from fal_client import InProgress
+
     if isinstance(update, InProgress) and update.logs:
         for log_msg in update.logs:
             # ensure we have a dict with a "message" key
@@ -77,136 +103,208 @@ def on_queue_update(update):
                 print(log_msg["message"])
 
 
-def generate_flux_image(prompt, seed):
-    # 1) Subscribe to the model
+@timed
+def generate_flux_image(prompt, seed, session=None, timeout=None):
     """
     Call Flux and return the raw image bytes.
     The same seed yields deterministic output for that prompt.
+    Pass a shared `session` to reuse pooled connections for the download, and
+    `timeout` (seconds) to bound the whole call, queue wait included.
     """
-    result = fal_client.subscribe(
-        FAL_MODEL,
-        arguments={
-            "prompt": prompt,
-            "seed": int(seed)          # <- force Flux to reuse this seed
-        },
-        with_logs=False,
-        on_queue_update=on_queue_update
-    )
-
+    # Network clients are only imported by runs that actually call Flux
+    import fal_client
+    import requests
+    from fal_client import Completed
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    arguments = {
+        "prompt": prompt,
+        "seed": int(seed)          # <- force Flux to reuse this seed
+    }
+
+    # 1) Submit to the model and wait for the result
+    if deadline is None:
+        result = fal_client.subscribe(
+            FAL_MODEL,
+            arguments=arguments,
+            with_logs=False,
+            on_queue_update=on_queue_update
+        )
+    else:
+        handle = fal_client.submit(FAL_MODEL, arguments=arguments)
+        while not isinstance(handle.status(), Completed):
+            if time.monotonic() >= deadline:
+                try:
+                    handle.cancel()
+                except Exception:
+                    pass
+                raise TimeoutError(f"Flux request did not complete within {timeout:.0f}s")
+            time.sleep(QUEUE_POLL_INTERVAL)
+        result = handle.get()
+
+    # 2) Ensure "images" exists and the first one has a URL
+    if not result.get("images"):
+        raise ValueError("No images found in the fal_client response.")
     first = result["images"][0]          # dict with a URL
-    img = requests.get(first["url"], timeout=30)
+    if "url" not in first:
+        raise ValueError("No 'url' key found for the image. Cannot download.")
+
+    # 3) Download the image within whatever time is left
+    download_timeout = DOWNLOAD_TIMEOUT
+    if deadline is not None:
+        download_timeout = max(1.0, min(download_timeout, deadline - time.monotonic()))
+    img = (session or requests).get(first["url"], timeout=download_timeout)
     img.raise_for_status()
     return img.content
 
-    print("[DEBUG] Full result:", result)
 
-    # 2) Ensure "images" exists
-    if "images" not in result or not result["images"]:
-        raise ValueError("No images found in the fal_client response.")
+class FalBackend:
+    """Generation backend that calls Flux and downloads through one pooled HTTP session."""
 
-    # 3) The first image is a dict with a 'url' key
-    first_image_dict = result["images"][0]
-    print("[DEBUG] First image dict:", first_image_dict)
+    def __init__(self, pool_size=CONCURRENCY):
+        import requests
+        from requests.adapters import HTTPAdapter
 
-    # We expect something like:
-    # {
-    #   'url': 'https://fal.media/files/...',
-    #   'width': 2752,
-    #   'height': 1536,
-    #   'content_type': 'image/jpeg'
-    # }
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-    if "url" not in first_image_dict:
-        raise ValueError("No 'url' key found for the image. Cannot download.")
+    def generate(self, prompt, seed, timeout=None):
+        return generate_flux_image(prompt, seed, session=self.session, timeout=timeout)
 
-    image_url = first_image_dict["url"]
 
-    # 4) Download the image from this URL
-    response = requests.get(image_url)
-    response.raise_for_status()  # Raises an error if the download failed
-    image_bytes = response.content  # This is the raw JPEG/PNG/etc. data
-
-    # 5) Return the raw bytes
-    return image_bytes
+def plan_tasks(start_index, num_prompts, num_expressions, sampler=None):
+    """
+    Build every (prompt, expression) task up front, in the order the CSV rows
+    should appear. All randomness happens here, so the plan alone decides the
+    output regardless of the order in which images finish.
 
-def main():
-    model_dir = os.path.join(OUTPUT_ROOT, MODEL_ID)
+    With a FeatureSampler, face combinations are never repeated and the
+    expressions of one prompt are all distinct.
+    """
+    tasks = []
+    for i in range(num_prompts):
+        # Always pick the next unused PID
+        prompt_str = zero_pad(start_index + i, PROMPT_PAD)    # e.g. "00003" or "00004"
+        seed_val = random.randint(0, 99999)
+        seed_str = zero_pad(seed_val, SEED_PAD)
+        features = sampler.sample() if sampler is not None else None
+        full_prompt_text = generate_main_description(features) + base_instruction
+
+        expression_sampler = None
+        if sampler is not None:
+            expression_sampler = FeatureSampler(FeatureSpace(face_features(), ["Expression"]), "stratified", rng=sampler.rng)
+
+        for e_idx in range(1, num_expressions + 1):
+            expr_str = zero_pad(e_idx, EXPR_PAD)              # e.g. "001"
+            tasks.append(GenerationTask(
+                pid=prompt_str,
+                sid=seed_str,
+                seed=seed_val,
+                expression_id=f"E{expr_str}",
+                prompt_text=full_prompt_text,
+                expression_text=generate_expression_description(
+                    expression_sampler.sample()["Expression"] if expression_sampler else None),
+            ))
+    return tasks
+
+
+def positive_float(value):
+    """argparse type for options that must be greater than zero."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def add_arguments(parser):
+    parser.add_argument('--features', type=str, default=FEATURES_PATH, help="Face feature lists (JSON).")
+    parser.add_argument('--output_root', type=str, default=OUTPUT_ROOT, help="Folder holding the <model>/ dataset folder.")
+    parser.add_argument('--num_prompts', type=int, default=NUM_PROMPTS, help="Number of new prompts (subjects) to generate.")
+    parser.add_argument('--num_expressions', type=int, default=NUM_EXPRESSIONS, help="Number of expressions per prompt.")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="Maximum number of image requests in flight.")
+    parser.add_argument('--backend', choices=["fal", "fake"], default="fal", help="Use 'fake' to run offline without calling Flux.")
+    parser.add_argument('--max_attempts', type=int, default=MAX_ATTEMPTS, help="Attempts per image before it is marked failed.")
+    parser.add_argument('--rate', type=positive_float, default=REQUESTS_PER_MINUTE, help="Maximum Flux requests per minute.")
+    parser.add_argument('--task_timeout', type=float, default=TASK_TIMEOUT, help="Deadline in seconds for each image, retries included.")
+    parser.add_argument('--sampling', choices=MODES, default="stratified", help="How face features are drawn; every mode skips combinations used before.")
+    parser.add_argument('--cache_dir', type=str, default=None, help=f"Content-addressed image cache (default: <output_root>/cache, i.e. {CACHE_DIR}; keep it on the dataset's filesystem so images can be hardlinked).")
+    parser.add_argument('--cache_size_gb', type=float, default=CACHE_SIZE_GB, help="Cache size limit; least recently used images are evicted beyond it.")
+    parser.add_argument('--no_cache', action='store_true', help="Always call the backend and write images directly.")
+    parser.add_argument('--resume', action='store_true', help="Re-dispatch only unfinished tasks from the manifest instead of planning new prompts.")
+    return parser
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Generate face prompts and their Flux images.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
+def run(args, table=None, final=True):
+    """Run a generation on parsed arguments; pipeline input (`table`) is not used."""
+    model_dir = os.path.join(args.output_root, MODEL_ID)
     os.makedirs(model_dir, exist_ok=True)
 
-    prompts_csv_path = os.path.join(model_dir, "prompts.csv")
-    csv_exists = os.path.isfile(prompts_csv_path)
+    # 1) Open the job manifest; datasets from before the manifest are imported once
+    manifest = JobManifest(os.path.join(model_dir, "manifest.sqlite"))
+    if manifest.is_empty():
+        manifest.import_legacy(model_dir)
 
-    # 1) Count how many prompts are already on disk
-    if csv_exists:
-        with open(prompts_csv_path, newline="", encoding="utf-8") as f:
-            existing_rows = sum(1 for _ in f) - 1   # subtract header
+    # 2) Either pick up unfinished work or plan new prompts after the last PID
+    if args.resume:
+        tasks = manifest.unfinished()
     else:
-        existing_rows = 0
-
-    # 1a) Ensure prompts.csv ends with a newline so we append on a new row
-    if csv_exists:
-        with open(prompts_csv_path, "rb+") as f:
-            f.seek(0, os.SEEK_END)
-            if f.tell() > 0:
-                f.seek(-1, os.SEEK_END)
-                last = f.read(1)
-                if last not in (b"\n", b"\r"):
-                    f.write(b"\n")
-
-    # 2) Now open in append mode *after* counting
-    with open(prompts_csv_path, "a", newline="", encoding="utf-8") as prompts_csv:
-        writer = csv.writer(prompts_csv)
-
-        if not csv_exists:
-            writer.writerow(["PID", "SID", "Prompt"])
-
-        # 3) Generate your new prompts
-        for i in range(NUM_PROMPTS):
-            # Always pick the next unused PID
-            prompt_index = existing_rows + i + 1
-            prompt_str  = zero_pad(prompt_index, PROMPT_PAD)   # e.g. "00003" or "00004"
-            seed_val     = random.randint(0, 99999)
-            seed_str     = zero_pad(seed_val, SEED_PAD)
-            prefixed_pid = f"P{prompt_str}"
-            prefixed_sid = f"S{seed_str}"
-
-            # build prompt text and write one row
-            main_desc        = generate_main_description()
-            full_prompt_text = main_desc + base_instruction
-            writer.writerow([prefixed_pid, prefixed_sid, full_prompt_text])
-
-            # 4) Create the folder for this seed+prompt
-            folder_name = f"SID{seed_str}_PID{prompt_str}"
-            prompt_folder = os.path.join(model_dir, folder_name)
-            os.makedirs(prompt_folder, exist_ok=True)
-
-            # 5) Open (or create) expressions.csv for this prompt
-            expressions_csv_path = os.path.join(prompt_folder, "expressions.csv")
-            is_new_expr = not os.path.isfile(expressions_csv_path)
-            with open(expressions_csv_path, "a", newline="", encoding="utf-8") as expr_csv:
-                expr_writer = csv.writer(expr_csv)
-                if is_new_expr:
-                    expr_writer.writerow(["ExpressionID", "ExpressionText"])
-
-                # 6) Generate each expression variation
-                for e_idx in range(1, NUM_EXPRESSIONS + 1):
-                    expr_str    = zero_pad(e_idx, EXPR_PAD)     # e.g. "001"
-                    prefixed_e  = f"E{expr_str}"                # e.g. "E001"
-                    expr_text   = generate_expression_description()
-                    expr_writer.writerow([prefixed_e, expr_text])
-
-                    # now call the API with that same expr_text…
-                    final_prompt = f"{full_prompt_text} {expr_text}"
-                    try:
-                        image_data = generate_flux_image(final_prompt, seed_val)
-                        image_filename = os.path.join(prompt_folder, f"{prefixed_e}.jpg")
-                        with open(image_filename, "wb") as img_file:
-                            img_file.write(image_data)
-                    except Exception as e:
-                        print(f"[ERROR] Prompt {prompt_str} Expr {prefixed_e}: {e}")
-
-
-    print(f"Done! Generated {NUM_PROMPTS} prompts, each with {NUM_EXPRESSIONS} expressions under: {model_dir}")
+        space = FeatureSpace(load_features(args.features), MAIN_CATEGORIES)
+        seen = SeenSet(os.path.join(model_dir, f"seen_features_{space.fingerprint}.bin"))
+        sampler = FeatureSampler(space, args.sampling, seen=seen)
+        tasks = plan_tasks(manifest.next_index(), args.num_prompts, args.num_expressions, sampler)
+        manifest.add_tasks(tasks)
+        sampler.commit()
+    backend = ScheduledBackend(
+        FalBackend(pool_size=args.concurrency) if args.backend == "fal" else FakeBackend(),
+        retry=RetryPolicy(max_attempts=args.max_attempts),
+        bucket=TokenBucket(args.rate / 60.0, capacity=args.concurrency),
+        breaker=CircuitBreaker(),
+        task_timeout=args.task_timeout,
+    )
+
+    # 3) Generate concurrently, serving cached (model, prompt, seed) images without a request;
+    #    every outcome is journaled as it lands
+    start = time.perf_counter()
+    cache = None
+    if not args.no_cache:
+        cache = ImageCache(args.cache_dir or os.path.join(args.output_root, "cache"), max_bytes=int(args.cache_size_gb * 1024 ** 3))
+    writer = ManifestWriter(model_dir, manifest, cache=cache,
+                            model=FAL_MODEL if args.backend == "fal" else "fake")
+    try:
+        with timer("generation.run"):
+            for result in run_generation(writer.uncached(tasks), backend, concurrency=args.concurrency,
+                                         on_submit=writer.dispatch):
+                writer.write(result)
+    finally:
+        writer.close()
+        if cache is not None:
+            print(cache.summary())
+            cache.close()
+
+    counts = manifest.counts()
+    manifest.close()
+    metrics.update("generation.tasks", counts)
+    metrics.update("generation.scheduler", backend.stats)
+    print(f"Done! Dispatched {len(tasks)} images under: {model_dir} ({time.perf_counter() - start:.1f}s) "
+          f"- done: {counts.get('done', 0)}, failed: {counts.get('failed', 0)}, "
+          f"pending: {counts.get('pending', 0) + counts.get('in_flight', 0)}")
+    print(f"Scheduler: {backend.stats}")
+    return counts
+
+
+def main():
+    args = parse_arguments()
+    start_run("gen-prompts", args.profile, args.profile_report)
+    run(args)
 
 
 if __name__ == "__main__":
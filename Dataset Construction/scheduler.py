@@ -0,0 +1,216 @@
+"""
+Retry, rate-limit and deadline scheduling around a generation backend.
+
+``ScheduledBackend`` wraps any backend exposing
+``generate(prompt, seed, timeout=None) -> bytes`` and adds:
+
+- exponential backoff with full jitter for transient errors (honoring
+  ``Retry-After`` on throttling responses),
+- a token bucket that caps the request rate across all worker threads,
+- a circuit breaker that pauses dispatch when the recent error rate spikes,
+- a per-task deadline covering every attempt and every wait.
+"""
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a task runs out of time before an attempt succeeds."""
+
+
+def error_status(exc):
+    """Return the HTTP status code carried by an exception, if any."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+
+def retry_after(exc):
+    """Return the server's Retry-After delay in seconds, if it sent one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(exc):
+    return error_status(exc) == 429
+
+
+def transport_errors():
+    """Exception types raised when a connection fails or a request times out."""
+    # OSError covers TimeoutError, ConnectionError and requests' ConnectionError / Timeout
+    errors = [OSError]
+    httpx = sys.modules.get("httpx")    # fal_client's HTTP client, only checked once loaded
+    if httpx is not None:
+        errors.append(httpx.TransportError)
+    return tuple(errors)
+
+
+def is_retryable(exc):
+    """Transport errors, 408, throttling (429) and 5xx are retried; anything else is not."""
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    status = error_status(exc)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    # requests reports malformed URLs with OSError subclasses that are also ValueErrors
+    return isinstance(exc, transport_errors()) and not isinstance(exc, ValueError)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0, rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt, exc=None):
+        """Seconds to wait before retrying after failed attempt number `attempt` (1-based)."""
+        backoff = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        server_delay = retry_after(exc) if exc is not None else None
+        return max(backoff, server_delay or 0.0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, deadline=None):
+        """Take one token, sleeping until one is available or `deadline` passes."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                raise DeadlineExceeded("rate limiter wait exceeds task deadline")
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reports throttling."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+
+class CircuitBreaker:
+    """
+    Opens when at least `threshold` of the last `window` calls failed, pausing
+    every caller for `cooldown` seconds. The window is cleared on opening, so
+    the calls after the pause decide whether it opens again.
+    """
+
+    def __init__(self, window=20, threshold=0.5, cooldown=30.0, min_calls=5):
+        self.window = window
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.min_calls = min_calls
+        self.outcomes = deque(maxlen=window)
+        self.open_until = 0.0
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def before_call(self, deadline=None):
+        with self.lock:
+            open_until = self.open_until
+        now = time.monotonic()
+        if open_until > now:
+            if deadline is not None and open_until > deadline:
+                raise DeadlineExceeded("circuit breaker is open past the task deadline")
+            time.sleep(open_until - now)
+
+    def record(self, success):
+        with self.lock:
+            self.outcomes.append(success)
+            calls = len(self.outcomes)
+            failures = self.outcomes.count(False)
+            if calls >= self.min_calls and failures / calls >= self.threshold:
+                self.open_until = time.monotonic() + self.cooldown
+                self.outcomes.clear()
+                self.trips += 1
+                print(f"[WARN] Error rate {failures}/{calls} - pausing dispatch for {self.cooldown:.0f}s")
+
+
+class ScheduledBackend:
+    """Backend wrapper applying retries, rate limiting, circuit breaking and deadlines."""
+
+    def __init__(self, backend, retry=None, bucket=None, breaker=None, task_timeout=None):
+        self.backend = backend
+        self.retry = retry or RetryPolicy()
+        self.bucket = bucket
+        self.breaker = breaker
+        self.task_timeout = task_timeout
+        self.stats = {"attempts": 0, "retries": 0, "throttled": 0, "failed": 0, "deadline": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def generate(self, prompt, seed, timeout=None):
+        """Generate one image within the task deadline, tightened by the caller's `timeout` if given."""
+        limit = min((t for t in (self.task_timeout, timeout) if t), default=None)
+        deadline = time.monotonic() + limit if limit else None
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if self.breaker is not None:
+                    self.breaker.before_call(deadline)
+                if self.bucket is not None:
+                    self.bucket.acquire(deadline)
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceeded(f"task deadline of {limit}s exceeded")
+
+                self._count("attempts")
+                image = self.backend.generate(prompt, seed, timeout=remaining)
+            except DeadlineExceeded:
+                self._count("deadline")
+                raise
+            except Exception as e:
+                if self.breaker is not None:
+                    self.breaker.record(False)
+                if is_rate_limited(e):
+                    self._count("throttled")
+                    if self.bucket is not None:
+                        self.bucket.drain()
+                if not is_retryable(e) or attempt >= self.retry.max_attempts:
+                    self._count("failed")
+                    raise
+
+                delay = self.retry.delay(attempt, e)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    self._count("deadline")
+                    raise DeadlineExceeded(f"no time left to retry after: {e}") from e
+                self._count("retries")
+                time.sleep(delay)
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True)
+                return image
@@ -0,0 +1,101 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import dataset_shards
+from dataset_shards import ShardedDataset, pack_dataset
+
+
+def write_dataset(model_dir, images):
+    """A generated dataset: `images` maps (pid, sid) to {expression id: JPEG bytes}."""
+    os.makedirs(model_dir)
+    with open(os.path.join(model_dir, "prompts.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PID", "SID", "Prompt"])
+        for (pid, sid), expressions in images.items():
+            writer.writerow([f"P{pid}", f"S{sid}", f"prompt {pid}"])
+            folder = os.path.join(model_dir, f"SID{sid}_PID{pid}")
+            os.makedirs(folder)
+            with open(os.path.join(folder, "expressions.csv"), "w", newline="", encoding="utf-8") as ef:
+                expression_writer = csv.writer(ef)
+                expression_writer.writerow(["ExpressionID", "ExpressionText"])
+                for expression_id, data in expressions.items():
+                    expression_writer.writerow([expression_id, f"expression {expression_id}"])
+                    with open(os.path.join(folder, f"{expression_id}.jpg"), "wb") as image_file:
+                        image_file.write(data)
+
+
+def jpeg(pixels, path):
+    Image.fromarray(pixels).resize((128, 128)).convert("RGB").save(path, quality=90)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def faces(tmp_path):
+    rng = np.random.default_rng(0)
+    base = (rng.random((16, 16)) * 255).astype(np.uint8)
+    other = (rng.random((16, 16)) * 255).astype(np.uint8)
+    return {
+        "same": jpeg(base, tmp_path / "a.jpg"),
+        "again": jpeg(base, tmp_path / "b.jpg"),
+        "other": jpeg(other, tmp_path / "c.jpg"),
+    }
+
+
+def test_pack_round_trip_and_duplicates(tmp_path, faces):
+    model_dir = tmp_path / "FLUX"
+    write_dataset(str(model_dir), {("00001", "000042"): {"E001": faces["same"], "E002": faces["other"],
+                                                           "E003": faces["again"]}})
+    summary = pack_dataset(str(model_dir), str(tmp_path / "packed"), workers=1)
+    assert summary["images"] == 3 and summary["duplicates"] == 1 and summary["undecodable"] == 0
+
+    dataset = ShardedDataset(str(tmp_path / "packed"))
+    assert [dataset.image(i) for i in range(3)] == [faces["same"], faces["other"], faces["again"]]
+    assert [record["ExpressionID"] for record in dataset.duplicates()] == ["E003"]
+    assert dataset[0]["Prompt"] == "prompt 00001"
+    dataset.close()
+
+
+def test_undecodable_images_are_packed_without_a_hash(tmp_path, faces):
+    model_dir = tmp_path / "FLUX"
+    # What --backend fake writes: bytes that are not an image
+    write_dataset(str(model_dir), {("00001", "000042"): {"E001": b"not an image", "E002": b"not an image",
+                                                           "E003": faces["same"]}})
+    summary = pack_dataset(str(model_dir), str(tmp_path / "packed"), workers=1)
+    assert summary["images"] == 3 and summary["undecodable"] == 2 and summary["duplicates"] == 0
+
+    dataset = ShardedDataset(str(tmp_path / "packed"))
+    assert dataset.image(0) == b"not an image"
+    assert [record["PHash"] for record in dataset.records][:2] == ["", ""]
+    assert not dataset.index["hashed"][0] and dataset.index["hashed"][2]
+    dataset.close()
+
+
+def test_failed_pack_removes_the_temporary_directory(tmp_path, faces, monkeypatch):
+    model_dir = tmp_path / "FLUX"
+    write_dataset(str(model_dir), {("00001", "000042"): {"E001": faces["same"]}})
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(dataset_shards, "find_duplicates", fail)
+    with pytest.raises(RuntimeError):
+        pack_dataset(str(model_dir), str(tmp_path / "packed"), workers=1)
+    assert not (tmp_path / "packed.tmp").exists() and not (tmp_path / "packed").exists()
+
+
+def test_close_while_a_record_is_held(tmp_path, faces):
+    model_dir = tmp_path / "FLUX"
+    write_dataset(str(model_dir), {("00001", "000042"): {"E001": faces["same"], "E002": faces["other"]}})
+    pack_dataset(str(model_dir), str(tmp_path / "packed"), workers=1)
+
+    dataset = ShardedDataset(str(tmp_path / "packed"))
+    record = dataset[1]
+    images = [item["Image"] for item in dataset]
+    dataset.close()
+    assert record["Image"] == faces["other"]
+    assert images == [faces["same"], faces["other"]]
@@ -0,0 +1,27 @@
+import random
+
+from feature_sampler import FeatureSampler, FeatureSpace, SeenSet
+
+FEATURES = {
+    "Shape": {"Face": ["oval", "round", "square", "heart"], "Nose": ["small", "wide", "long"]},
+    "Color": {"Eyes": ["brown", "blue", "green", "gray", "hazel"], "Hair": ["black", "red"]},
+}
+
+
+def draw(path, count, seed):
+    space = FeatureSpace(FEATURES, ["Shape", "Color"])
+    sampler = FeatureSampler(space, "halton", seen=SeenSet(path), rng=random.Random(seed))
+    indices = [sampler.sample_index() for _ in range(count)]
+    sampler.commit()
+    return indices
+
+
+def test_halton_resume_continues_the_sequence(tmp_path):
+    single = draw(str(tmp_path / "single.bin"), 40, seed=1)
+
+    resumed_path = str(tmp_path / "resumed.bin")
+    # A resumed run gets a different rng; the saved shift must win over it
+    resumed = draw(resumed_path, 25, seed=1) + draw(resumed_path, 15, seed=2)
+
+    assert resumed == single
+    assert len(set(resumed)) == 40
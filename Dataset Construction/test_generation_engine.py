@@ -0,0 +1,52 @@
+import random
+import threading
+
+from generation_engine import FakeBackend, GenerationTask, run_generation
+
+
+class InFlightBackend:
+    """Wraps a backend and records the most calls it ever saw running at once."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt, seed, timeout=None):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            return self.backend.generate(prompt, seed, timeout=timeout)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def make_tasks(count):
+    return [GenerationTask(pid=f"{i:05d}", sid=f"{i:06d}", seed=i, expression_id="E001",
+                           prompt_text=f"face {i}", expression_text="smiling") for i in range(count)]
+
+
+def test_results_in_task_order_with_bounded_concurrency():
+    tasks = make_tasks(40)
+    backend = InFlightBackend(FakeBackend(jitter=0.02, rng=random.Random(0)))
+    submitted = []
+
+    results = list(run_generation(tasks, backend, concurrency=4, on_submit=submitted.append))
+
+    assert [result.task for result in results] == tasks
+    assert submitted == tasks
+    assert all(result.ok for result in results)
+    assert backend.peak <= 4
+    assert backend.peak > 1
+
+
+def test_failures_are_returned_in_place():
+    tasks = make_tasks(10)
+
+    results = list(run_generation(tasks, FakeBackend(failure_rate=1.0, rng=random.Random(0)), concurrency=3))
+
+    assert [result.task for result in results] == tasks
+    assert all(result.error.status_code == 500 for result in results)
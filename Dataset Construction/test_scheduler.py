@@ -0,0 +1,130 @@
+import random
+import time
+
+import pytest
+
+from generation_engine import FakeBackend, SimulatedError
+from scheduler import CircuitBreaker, DeadlineExceeded, RetryPolicy, ScheduledBackend, TokenBucket
+
+
+class ScriptedBackend:
+    """Backend raising the queued exceptions in turn, then returning an image."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, prompt, seed, timeout=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return b"image"
+
+
+def no_wait(max_attempts=3):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.0, rng=random.Random(0))
+
+
+def test_retries_until_success():
+    backend = ScriptedBackend(SimulatedError("busy", 503), TimeoutError("slow"))
+    scheduled = ScheduledBackend(backend, retry=no_wait())
+
+    assert scheduled.generate("prompt", 1) == b"image"
+    assert backend.calls == 3
+    assert scheduled.stats["retries"] == 2
+
+
+def test_retry_exhaustion_raises_the_last_error():
+    scheduled = ScheduledBackend(FakeBackend(failure_rate=1.0, rng=random.Random(0)), retry=no_wait())
+
+    with pytest.raises(SimulatedError) as error:
+        scheduled.generate("prompt", 1)
+    assert error.value.status_code == 500
+    assert scheduled.stats["attempts"] == 3
+    assert scheduled.stats["failed"] == 1
+
+
+@pytest.mark.parametrize("error", [SimulatedError("not found", 404), ValueError("No images found")])
+def test_client_errors_are_not_retried(error):
+    backend = ScriptedBackend(error)
+    scheduled = ScheduledBackend(backend, retry=no_wait())
+
+    with pytest.raises(type(error)):
+        scheduled.generate("prompt", 1)
+    assert backend.calls == 1
+
+
+def test_throttling_drains_the_bucket():
+    bucket = TokenBucket(rate=1000.0, capacity=5)
+    scheduled = ScheduledBackend(FakeBackend(throttle_rate=1.0, rng=random.Random(0)), retry=no_wait(1),
+                                 bucket=bucket)
+
+    with pytest.raises(SimulatedError):
+        scheduled.generate("prompt", 1)
+    assert scheduled.stats["throttled"] == 1
+    assert bucket.tokens < 1
+
+
+def test_backoff_jitter_stays_within_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0, rng=random.Random(0))
+
+    for attempt in range(1, 8):
+        assert 0.0 <= policy.delay(attempt) <= min(4.0, 2 ** (attempt - 1))
+
+
+def test_backoff_honors_retry_after():
+    class Response:
+        status_code = 429
+        headers = {"Retry-After": "7"}
+
+    error = SimulatedError("slow down", 429)
+    error.response = Response()
+
+    assert RetryPolicy(base_delay=1.0, rng=random.Random(0)).delay(1, error) == 7.0
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_token_bucket_wait_past_deadline_aborts():
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    bucket.acquire()
+
+    with pytest.raises(DeadlineExceeded):
+        bucket.acquire(deadline=time.monotonic() + 0.1)
+
+
+def test_breaker_opens_then_recovers_after_cooldown():
+    breaker = CircuitBreaker(window=4, threshold=0.5, cooldown=0.2, min_calls=4)
+    failing = ScheduledBackend(FakeBackend(failure_rate=1.0, rng=random.Random(0)), retry=no_wait(1),
+                               breaker=breaker)
+    for _ in range(4):
+        with pytest.raises(SimulatedError):
+            failing.generate("prompt", 1)
+    assert breaker.trips == 1
+
+    # While open, a task whose deadline ends first is not dispatched
+    with pytest.raises(DeadlineExceeded):
+        breaker.before_call(deadline=time.monotonic() + 0.05)
+
+    # Half-open: the first call after the cooldown goes through and its success is recorded
+    healthy = ScheduledBackend(FakeBackend(rng=random.Random(0)), retry=no_wait(1), breaker=breaker)
+    start = time.monotonic()
+    assert healthy.generate("prompt", 1)
+    assert time.monotonic() - start >= 0.1
+    assert list(breaker.outcomes) == [True]
+    assert breaker.trips == 1
+
+
+def test_deadline_aborts_slow_backend():
+    scheduled = ScheduledBackend(FakeBackend(latency=1.0, rng=random.Random(0)),
+                                 retry=RetryPolicy(max_attempts=5, base_delay=1.0, rng=random.Random(0)),
+                                 task_timeout=0.1)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        scheduled.generate("prompt", 1)
+    assert time.monotonic() - start < 0.5
+    assert scheduled.stats["deadline"] == 1
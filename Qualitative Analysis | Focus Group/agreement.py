@@ -0,0 +1,219 @@
+'''
+    Inter-coder agreement on the code book: builds a code x coder matrix of
+    counts from the joined code book and computes Cohen's kappa (each pair of
+    coders), Fleiss' kappa and Krippendorff's alpha, overall and per code,
+    with bootstrap confidence intervals over codes.'''
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Code Exporting | Survey"))
+from codebook import Codebook
+from table_io import write_tables
+
+CODERS = ["Hoorad", "Anam", "Joshua"]
+
+# Resamples evaluated per vectorized batch, bounding memory to ~batch x codes x coders
+BATCH_SIZE = 256
+
+
+def coder_matrix(joined: pd.DataFrame, coders: list = CODERS) -> pd.DataFrame:
+    """
+    Code x coder matrix of counts from a joined code book, keeping only codes
+    with a count from every coder (codes found only in the dictionary carry no ratings).
+    """
+    matrix = joined.set_index("Code")[list(coders)].apply(pd.to_numeric, errors="coerce")
+    return matrix[matrix.notna().all(axis=1)]
+
+
+def _one_hot(ratings: np.ndarray, categories: int) -> np.ndarray:
+    """(..., coders) integer ratings, -1 for missing -> (..., coders, categories) indicators."""
+    return (ratings[..., None] == np.arange(categories)).astype(np.float64)
+
+
+def _weights(weights, items: int) -> np.ndarray:
+    """(batch, items) item multiplicities; a single batch of ones when not resampling."""
+    return np.ones((1, items)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+
+def cohen_kappa(ratings: np.ndarray, categories: int, weights: np.ndarray = None) -> np.ndarray:
+    """
+    Cohen's kappa of every pair of coders.
+
+    `ratings` is an (items, coders) array of category indices with no missing
+    ratings. `weights` is a (batch, items) array of item multiplicities, e.g.
+    bootstrap resample counts. Returns a (batch, coders, coders) array.
+    """
+    items, coders = ratings.shape
+    weights = _weights(weights, items)
+    indicators = _one_hot(ratings, categories)
+    total = weights.sum(axis=1)[:, None, None]
+    agree = np.einsum("nik,njk->nij", indicators, indicators).reshape(items, -1)
+    observed = (weights @ agree).reshape(-1, coders, coders) / total
+    marginals = (weights @ indicators.reshape(items, -1)).reshape(-1, coders, categories) / total
+    expected = np.einsum("bik,bjk->bij", marginals, marginals)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (observed - expected) / (1 - expected)
+
+
+def fleiss_kappa(ratings: np.ndarray, categories: int, weights: np.ndarray = None):
+    """
+    Fleiss' kappa of an (items, coders) array of category indices with no
+    missing ratings, for each row of (batch, items) item `weights`. Returns
+    the (batch,) kappas and the (items,) per-item agreement P_i.
+    """
+    items, coders = ratings.shape
+    weights = _weights(weights, items)
+    counts = _one_hot(ratings, categories).sum(axis=1)
+    item_agreement = ((counts ** 2).sum(axis=1) - coders) / (coders * (coders - 1))
+    total = weights.sum(axis=1)
+    proportions = (weights @ counts) / (total[:, None] * coders)
+    expected = (proportions ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((weights @ item_agreement) / total - expected) / (1 - expected), item_agreement
+
+
+def krippendorff_alpha(values: np.ndarray, metric: str = "interval", weights: np.ndarray = None):
+    """
+    Krippendorff's alpha of a (units, coders) array with NaN for missing
+    values, using the 'nominal' or 'interval' difference metric, for each row
+    of (batch, units) unit `weights`. Returns the (batch,) alphas and the
+    (batch, units) per-unit alphas 1 - D_o(unit) / D_e, NaN for units with
+    fewer than two values.
+    """
+    weights = _weights(weights, values.shape[0])
+    present = ~np.isnan(values)
+    pairable = present.sum(axis=1)
+    usable = pairable >= 2
+    present &= usable[:, None]
+    pairable = np.where(usable, pairable, 0)
+    n = weights @ pairable
+
+    if metric == "interval":
+        x = np.where(present, values, 0.0)
+        unit_sum, unit_squares = x.sum(axis=1), (x ** 2).sum(axis=1)
+        # Sum of (x_i - x_j)^2 over ordered pairs i != j is 2 m sum(x^2) - 2 (sum x)^2
+        unit_disagreement = 2 * pairable * unit_squares - 2 * unit_sum ** 2
+        total_disagreement = 2 * n * (weights @ unit_squares) - 2 * (weights @ unit_sum) ** 2
+    elif metric == "nominal":
+        labels = np.where(present, values, -1).astype(np.int64)
+        counts = _one_hot(labels, int(labels.max(initial=0)) + 1).sum(axis=1)
+        # Ordered pairs with different values: m^2 - sum over categories of n_k^2
+        unit_disagreement = pairable ** 2 - (counts ** 2).sum(axis=1)
+        total_disagreement = n ** 2 - ((weights @ counts) ** 2).sum(axis=1)
+    else:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = total_disagreement / (n * (n - 1))
+        unit_observed = unit_disagreement / (pairable * (pairable - 1))
+        observed = (weights @ (pairable * np.nan_to_num(unit_observed))) / n
+        return 1 - observed / expected, 1 - unit_observed / expected[:, None]
+
+
+def agreement_statistics(counts: np.ndarray, coders: list, weights: np.ndarray = None) -> dict:
+    """
+    Every overall statistic for a (codes, coders) array of counts with no
+    missing values, for each row of (batch, codes) code `weights`. Kappas and
+    the nominal alpha rate whether each coder applied the code (count > 0);
+    the interval alpha compares the counts themselves.
+    """
+    presence = (counts > 0).astype(np.int64)
+    statistics = {
+        "Fleiss' kappa (applied)": fleiss_kappa(presence, 2, weights)[0],
+        "Krippendorff's alpha (applied, nominal)": krippendorff_alpha(presence.astype(np.float64), "nominal", weights)[0],
+        "Krippendorff's alpha (counts, interval)": krippendorff_alpha(counts, "interval", weights)[0],
+    }
+    pairwise = cohen_kappa(presence, 2, weights)
+    for i, j in combinations(range(len(coders)), 2):
+        statistics[f"Cohen's kappa {coders[i]}-{coders[j]} (applied)"] = pairwise[:, i, j]
+    return statistics
+
+
+def _bootstrap_batch(args):
+    counts, coders, resamples, seed = args
+    rng = np.random.default_rng(seed)
+    codes = counts.shape[0]
+    results = []
+    for start in range(0, resamples, BATCH_SIZE):
+        size = min(BATCH_SIZE, resamples - start)
+        # Resample codes with replacement, as multiplicities: every statistic is
+        # then a weighted sum over codes, i.e. one matrix product for the whole batch
+        draws = rng.integers(0, codes, (size, codes)) + np.arange(size)[:, None] * codes
+        weights = np.bincount(draws.ravel(), minlength=size * codes).reshape(size, codes)
+        results.append(np.column_stack(list(agreement_statistics(counts, coders, weights).values())))
+    return np.vstack(results)
+
+
+def bootstrap(counts: np.ndarray, coders: list, resamples: int = 2000, workers: int = None, seed: int = 0) -> np.ndarray:
+    """
+    (resamples, statistics) bootstrap distribution of agreement_statistics,
+    resampling codes. Resamples are split across a process pool, each worker
+    evaluating vectorized batches with its own independent random stream.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, resamples))
+    shares = [resamples // workers + (i < resamples % workers) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    jobs = [(counts, coders, share, child) for share, child in zip(shares, seeds) if share]
+    if len(jobs) == 1:
+        return _bootstrap_batch(jobs[0])
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        return np.vstack(list(pool.map(_bootstrap_batch, jobs)))
+
+
+def code_agreement(joined: pd.DataFrame, coders: list = CODERS, resamples: int = 2000,
+                   confidence: float = 0.95, workers: int = None, seed: int = 0) -> dict:
+    """
+    Agreement sheets of a joined code book, keyed by sheet name: the overall
+    statistics with percentile bootstrap intervals, and per code the counts,
+    how many coders applied it, the Fleiss per-item agreement on applying it
+    and the per-unit interval alpha of the counts.
+    """
+    matrix = coder_matrix(joined, coders)
+    counts = matrix.to_numpy(dtype=np.float64)
+
+    estimates = agreement_statistics(counts, coders)
+    overall = pd.DataFrame({"Statistic": list(estimates), "Estimate": [value[0] for value in estimates.values()]})
+    if resamples:
+        distribution = bootstrap(counts, coders, resamples, workers, seed)
+        tail = (1 - confidence) / 2 * 100
+        overall["CI Low"] = np.nanpercentile(distribution, tail, axis=0)
+        overall["CI High"] = np.nanpercentile(distribution, 100 - tail, axis=0)
+
+    by_code = matrix.reset_index()
+    by_code["Applied By"] = (counts > 0).sum(axis=1)
+    by_code["Agreement (applied)"] = fleiss_kappa((counts > 0).astype(np.int64), 2)[1]
+    by_code["Alpha (counts)"] = krippendorff_alpha(counts, "interval")[1][0]
+    return {"Agreement": overall, "By Code": by_code.sort_values("Alpha (counts)", kind="stable").reset_index(drop=True)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inter-coder agreement on the code book.")
+    parser.add_argument("--frequencies", default="./Code Book(Frequencies).csv", help="Per-coder code counts.")
+    parser.add_argument("--dictionary", default="./Code Book(Dictionary).csv", help="Code descriptions.")
+    parser.add_argument("--coders", nargs="+", default=CODERS, help="Coder columns.")
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples (0 to skip intervals).")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap random seed.")
+    parser.add_argument("--output", default="Code Book Agreement.xlsx",
+                        help="Agreement tables; the extension picks the format.")
+    args = parser.parse_args()
+
+    codebook = Codebook.from_files(frequencies=args.frequencies, dictionary=args.dictionary)
+    sheets = code_agreement(codebook.table("frequencies", "dictionary"), args.coders, args.resamples,
+                            args.confidence, args.workers, args.seed)
+    write_tables(sheets, args.output)
+
+    print(sheets["Agreement"].to_string(index=False))
+    print(f"\n✅ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,68 @@
 '''
-    This code get the code "Frequencies" sheet (ouput from mrege_frequencies)'''
+    This code get the code "Frequencies" sheet (ouput from mrege_frequencies)
+    and joins it with the code dictionary through the shared codebook index,
+    so case, spacing and spelling variants of a code still match.'''
 
-import pandas as pd
+import argparse
+import os
+import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Code Exporting | Survey"))
+from codebook import Codebook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, start_run, timed
 
 definition_adr = "./Code Book(Dictionary).csv"
 frequency_adr = "./Code Book(Frequencies).csv"
+output_adr = "Joined Code Book.csv"
+
+CODERS = ['Hoorad', 'Anam', 'Joshua']
+
+
+@timed
+def join_code_book(frequencies, dictionary, coders=CODERS):
+    """
+    Joins the per-coder frequencies (a file or a DataFrame) with the code
+    dictionary. Returns the joined table and the codebook, whose report() lists
+    codes that did not join, or only joined after normalization / fuzzy matching.
+    """
+    codebook = Codebook.from_files(frequencies=frequencies, dictionary=dictionary)
+    merged = codebook.table("frequencies", "dictionary")
+    return merged[['Code', 'Description'] + list(coders)], codebook
+
+
+def add_arguments(parser):
+    parser.add_argument("--frequencies", default=None,
+                        help=f"Per-coder code counts; defaults to the previous pipeline stage's table, else '{frequency_adr}'.")
+    parser.add_argument("--dictionary", default=definition_adr, help="Code descriptions.")
+    parser.add_argument("--coders", nargs="+", default=CODERS, help="Coder columns.")
+    parser.add_argument("--output", default=None,
+                        help=f"Joined code book CSV (default: '{output_adr}', not written when another pipeline stage follows).")
+    return parser
+
+
+def run(args, table=None, final=True):
+    """Run on parsed arguments; `table` is the output of the previous pipeline stage, if any."""
+    merged, codebook = join_code_book(args.frequencies or (table if table is not None else frequency_adr),
+                                      args.dictionary, args.coders)
+    output = args.output or (output_adr if final else None)
+    if output:
+        merged.to_csv(output)
+
+    # Codes that did not join, or only joined after normalization / fuzzy matching
+    print(codebook.report().to_string())
+    return merged
 
-definition = pd.read_csv(definition_adr)
-frequency = pd.read_csv(frequency_adr)
 
-merged = pd.merge(frequency, definition, how='outer', on=["Code"])
+def main():
+    parser = argparse.ArgumentParser(description="Join the code book frequencies with the code dictionary.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run("join-codebook", args.profile, args.profile_report)
+    run(args)
 
-merged = merged[['Code', 'Description', 'Hoorad', 'Anam', 'Joshua']]
 
-merged.to_csv('Joined Code Book.csv')
\ No newline at end of file
+if __name__ == "__main__":
+    main()
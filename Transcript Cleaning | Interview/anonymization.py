@@ -0,0 +1,180 @@
+"""
+Roster-based anonymization of transcript speech.
+
+All names on the roster (participants, colleagues, the interviewer, nicknames,
+first/last variants) are compiled into one Aho-Corasick automaton, so every
+paragraph is scanned once in time linear in its length, however many names
+the roster holds.
+
+The roster is a CSV file with a `Name` and a `Replacement` column, e.g.:
+
+    Name,Replacement
+    Alex Smith,P001
+    Alex,P001
+    Hoorad Abootalebi,Interviewer
+    Dr. Jones,[Colleague]
+"""
+import csv
+import logging
+
+
+# Titles that start a roster name but are not a first name of their own
+HONORIFICS = {"dr", "mr", "mrs", "ms", "miss", "mx", "prof", "professor", "sir", "dame"}
+
+
+def _is_first_name(token):
+    """Whether `token`, the first word of a roster name, can stand alone as a first name."""
+    return not token.endswith(".") and token.lower() not in HONORIFICS
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class NameAnonymizer:
+    """
+    Case-insensitive, whole-word, leftmost-longest multi-pattern replacement
+    built on an Aho-Corasick automaton.
+    """
+
+    def __init__(self, names):
+        """
+        Args:
+            names (dict): Name variant -> replacement string.
+        """
+        self.goto = [{}]        # state -> {char: next state}
+        self.fail = [0]
+        self.output = [None]    # state -> (pattern length, replacement) of the longest pattern ending here
+        self.dict_link = [0]    # state -> nearest state on the fail chain that has an output
+        self.size = 0
+
+        for name, replacement in names.items():
+            pattern = " ".join(name.lower().split())
+            if pattern:
+                self._add(pattern, replacement)
+        self._build()
+
+    @classmethod
+    def from_roster(cls, roster_path, include_first_names=True):
+        """
+        Build an anonymizer from a roster CSV.
+
+        Args:
+            roster_path (str): CSV with `Name` and `Replacement` columns.
+            include_first_names (bool): Also replace the first name of every
+                multi-word name, unless the roster maps it explicitly. Titles
+                such as "Dr." or "Prof" are never taken for a first name.
+
+        Returns:
+            NameAnonymizer: The compiled matcher.
+        """
+        names = {}
+        with open(roster_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                name = (row.get("Name") or "").strip()
+                if name:
+                    names[name] = (row.get("Replacement") or "").strip()
+        if include_first_names:
+            for name, replacement in list(names.items()):
+                parts = name.split()
+                if len(parts) > 1 and parts[0] not in names and _is_first_name(parts[0]):
+                    names[parts[0]] = replacement
+        logging.info(f"Loaded {len(names)} name variants from roster: {roster_path}")
+        return cls(names)
+
+    def _add(self, pattern, replacement):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.dict_link.append(0)
+            state = next_state
+        self.output[state] = (len(pattern), replacement)
+        self.size += 1
+
+    def _build(self):
+        # Breadth-first pass computing failure and dictionary-suffix links
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                fail_state = self.fail[child]
+                self.dict_link[child] = fail_state if self.output[fail_state] else self.dict_link[fail_state]
+
+    def _lowered(self, text):
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Keep positions aligned for the rare characters whose lower case is longer
+            lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+        return lowered
+
+    def find(self, text):
+        """
+        Find every whole-word roster name in `text`.
+
+        Args:
+            text (str): Text to scan (whitespace already collapsed).
+
+        Returns:
+            list: Non-overlapping (start, end, replacement) tuples, leftmost-longest first.
+        """
+        if not self.size:
+            return []
+        lowered = self._lowered(text)
+        goto, fail, output, dict_link = self.goto, self.fail, self.output, self.dict_link
+        matches = []
+        state = 0
+        for end, char in enumerate(lowered, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if output[state] else dict_link[state]
+            while hit:
+                length, replacement = output[hit]
+                start = end - length
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (end == len(text) or not _is_word_char(text[end])):
+                    matches.append((start, end, replacement))
+                hit = dict_link[hit]
+
+        # Keep leftmost-longest matches that do not overlap an earlier one
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        selected = []
+        last_end = 0
+        for start, end, replacement in matches:
+            if start >= last_end:
+                selected.append((start, end, replacement))
+                last_end = end
+        return selected
+
+    def anonymize(self, text):
+        """
+        Replace every roster name in `text` with its replacement.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            str: The text with names replaced.
+        """
+        matches = self.find(text)
+        if not matches:
+            return text
+        parts = []
+        position = 0
+        for start, end, replacement in matches:
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
@@ -0,0 +1,92 @@
+"""
+State file for incremental transcript cleaning.
+
+Maps every source transcript to its size, mtime and content hash, and to the
+cleaning rules and output it was last built with. A source whose size and
+mtime are unchanged is skipped without being read; one whose mtime moved but
+whose content hash did not (e.g. a copy or a re-save without edits) is skipped
+after hashing only. Anything else, or new cleaning rules, triggers a rebuild
+of that one output.
+"""
+import hashlib
+import json
+import logging
+import os
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Hash a file's content.
+
+    Args:
+        path (str): File to hash.
+        chunk_size (int): Bytes read at a time.
+
+    Returns:
+        str: Hex SHA-256 of the content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildState:
+    """Source path -> (size, mtime, sha256, rules, output) records persisted as JSON."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Location of the JSON state file (created on first save).
+        """
+        self.path = path
+        self.files = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.files = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable state file {path}: {e}")
+
+    def _key(self, source):
+        return os.path.relpath(source, os.path.dirname(os.path.abspath(self.path)))
+
+    def needs_build(self, source, output, rules):
+        """
+        Decide whether `source` has to be cleaned again.
+
+        Args:
+            source (str): Source transcript path.
+            output (str): Output path it is cleaned to.
+            rules (str): Fingerprint of the cleaning rules (cleaner version, roster, format).
+
+        Returns:
+            tuple: (bool, fingerprint dict to record once the build succeeds).
+        """
+        stat = os.stat(source)
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+        record = self.files.get(self._key(source))
+        if record is None or record.get("rules") != rules or record.get("output") != self._key(output) \
+                or not os.path.exists(output):
+            fingerprint["sha256"] = file_digest(source)
+            return True, fingerprint
+        if record.get("size") == fingerprint["size"] and record.get("mtime") == fingerprint["mtime"]:
+            return False, record
+        fingerprint["sha256"] = file_digest(source)
+        if fingerprint["sha256"] == record.get("sha256"):
+            # Touched but not edited: remember the new mtime so the next run is cheap again
+            record.update(fingerprint)
+            return False, record
+        return True, fingerprint
+
+    def record(self, source, output, rules, fingerprint):
+        """Remember a successful build of `source`."""
+        self.files[self._key(source)] = dict(fingerprint, rules=rules, output=self._key(output))
+
+    def save(self):
+        """Atomically write the state file."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
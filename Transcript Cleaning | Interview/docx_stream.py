@@ -0,0 +1,238 @@
+"""
+Lightweight streaming extraction of paragraph text from DOCX files.
+
+Reads the main document part straight out of the zip with an incremental XML
+parser and yields the text of each body paragraph as soon as it is parsed,
+without building python-docx's object model. Paragraph text follows
+python-docx's `Paragraph.text`: runs and hyperlink runs directly inside a
+body-level `w:p`, with tabs, breaks and non-breaking hyphens translated the
+same way. Paragraph style names can be streamed alongside the text.
+"""
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+STYLES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+
+W_BODY = f"{{{W_NS}}}body"
+W_P = f"{{{W_NS}}}p"
+W_R = f"{{{W_NS}}}r"
+W_HYPERLINK = f"{{{W_NS}}}hyperlink"
+W_T = f"{{{W_NS}}}t"
+W_BR = f"{{{W_NS}}}br"
+W_TYPE = f"{{{W_NS}}}type"
+W_PPR = f"{{{W_NS}}}pPr"
+W_PSTYLE = f"{{{W_NS}}}pStyle"
+W_STYLE = f"{{{W_NS}}}style"
+W_NAME = f"{{{W_NS}}}name"
+W_VAL = f"{{{W_NS}}}val"
+W_STYLE_ID = f"{{{W_NS}}}styleId"
+W_DEFAULT = f"{{{W_NS}}}default"
+
+# Run children with a fixed text equivalent (w:br depends on its type)
+RUN_TEXT = {
+    f"{{{W_NS}}}tab": "\t",
+    f"{{{W_NS}}}ptab": "\t",
+    f"{{{W_NS}}}cr": "\n",
+    f"{{{W_NS}}}noBreakHyphen": "-",
+}
+
+
+class UnsupportedDocument(ValueError):
+    """The file is a zip but not a WordprocessingML document this reader understands."""
+
+
+def main_part_name(archive):
+    """
+    Locate the main document part through the package relationships.
+
+    Args:
+        archive (zipfile.ZipFile): The opened DOCX package.
+
+    Returns:
+        str: Zip member name of the main document part.
+    """
+    try:
+        rels = ET.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("Type") == OFFICE_DOCUMENT_REL:
+            return posixpath.normpath(rel.get("Target").lstrip("/"))
+    raise UnsupportedDocument("No officeDocument relationship in package")
+
+
+def style_names(archive, part_name):
+    """
+    Map paragraph style ids to style names (e.g. 'Heading2' -> 'heading 2').
+
+    Args:
+        archive (zipfile.ZipFile): The opened DOCX package.
+        part_name (str): Zip member name of the main document part.
+
+    Returns:
+        tuple: (dict of style id -> name, name of the default paragraph style or None).
+    """
+    part_dir, part_file = posixpath.split(part_name)
+    styles_name = posixpath.join(part_dir, "styles.xml")
+    try:
+        rels = ET.fromstring(archive.read(posixpath.join(part_dir, "_rels", f"{part_file}.rels")))
+        for rel in rels.iter(f"{{{RELS_NS}}}Relationship"):
+            if rel.get("Type") == STYLES_REL:
+                styles_name = posixpath.normpath(posixpath.join(part_dir, rel.get("Target")))
+        styles = ET.fromstring(archive.read(styles_name))
+    except KeyError:
+        return {}, None
+
+    names = {}
+    default = None
+    for style in styles.iter(W_STYLE):
+        if style.get(W_TYPE) != "paragraph":
+            continue
+        name = style.find(W_NAME)
+        style_id = style.get(W_STYLE_ID)
+        names[style_id] = name.get(W_VAL) if name is not None else style_id
+        if style.get(W_DEFAULT) in ("1", "true"):
+            default = names[style_id]
+    return names, default
+
+
+def paragraph_style_id(paragraph):
+    """Style id set on a `w:p` element, or None when it uses the default style."""
+    properties = paragraph.find(W_PPR)
+    if properties is None:
+        return None
+    style = properties.find(W_PSTYLE)
+    return None if style is None else style.get(W_VAL)
+
+
+def _run_text(run):
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            text = RUN_TEXT.get(tag)
+            if text:
+                parts.append(text)
+    return "".join(parts)
+
+
+def paragraph_text(paragraph):
+    """
+    Text of a `w:p` element, as python-docx's `Paragraph.text` would return it.
+
+    Args:
+        paragraph (Element): A `w:p` element.
+
+    Returns:
+        str: The paragraph text.
+    """
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(run) for run in child if run.tag == W_R)
+    return "".join(parts)
+
+
+def _iter_body_paragraphs(archive, part_name):
+    with archive.open(part_name) as part:
+        depth = 0
+        body = None
+        body_depth = None
+        for event, elem in ET.iterparse(part, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1 and not elem.tag.startswith(f"{{{W_NS}}}"):
+                    raise UnsupportedDocument(f"Unexpected document element {elem.tag}")
+                if elem.tag == W_BODY and body is None:
+                    body, body_depth = elem, depth
+                continue
+
+            depth -= 1
+            if body is not None and depth == body_depth:
+                # A direct child of w:body is complete
+                if elem.tag == W_P:
+                    yield elem
+                body.remove(elem)
+        if body is None:
+            raise UnsupportedDocument("No w:body element in main document part")
+
+
+def iter_paragraph_text(file_path):
+    """
+    Lazily yield the text of every body-level paragraph of a DOCX file.
+
+    Paragraphs nested in tables, text boxes and the like are not body-level
+    and are skipped, as in python-docx's `Document.paragraphs`. Parsed
+    elements are discarded as soon as they are read, so memory stays flat
+    regardless of document size.
+
+    Args:
+        file_path (str): Path to the DOCX file.
+
+    Yields:
+        str: Paragraph text, in document order.
+
+    Raises:
+        zipfile.BadZipFile, KeyError, ET.ParseError, UnsupportedDocument: On files this reader cannot handle.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        for paragraph in _iter_body_paragraphs(archive, main_part_name(archive)):
+            yield paragraph_text(paragraph)
+
+
+def iter_styled_paragraphs(file_path):
+    """
+    Lazily yield the style name and text of every body-level paragraph of a DOCX file.
+
+    Style names are the names stored in the document's style part (built-in
+    styles use their English names, e.g. 'heading 2', whatever the UI
+    language), so compare them case-insensitively.
+
+    Args:
+        file_path (str): Path to the DOCX file.
+
+    Yields:
+        tuple: (style name or None, paragraph text), in document order.
+
+    Raises:
+        zipfile.BadZipFile, KeyError, ET.ParseError, UnsupportedDocument: On files this reader cannot handle.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        part_name = main_part_name(archive)
+        names, default = style_names(archive, part_name)
+        for paragraph in _iter_body_paragraphs(archive, part_name):
+            style_id = paragraph_style_id(paragraph)
+            style = default if style_id is None else names.get(style_id, style_id)
+            yield style, paragraph_text(paragraph)
+
+
+def trimmed(paragraphs, skip_head=0, skip_tail=0):
+    """
+    Drop the first `skip_head` and last `skip_tail` items of a stream without materializing it.
+
+    Args:
+        paragraphs (iterable): The stream.
+        skip_head (int): Items dropped at the start.
+        skip_tail (int): Items dropped at the end.
+
+    Yields:
+        The remaining items, in order.
+    """
+    buffer = []
+    for index, paragraph in enumerate(paragraphs):
+        if index < skip_head:
+            continue
+        buffer.append(paragraph)
+        if len(buffer) > skip_tail:
+            yield buffer.pop(0)
@@ -0,0 +1,21 @@
+from anonymization import NameAnonymizer
+
+
+def write_roster(path, rows):
+    path.write_text("Name,Replacement\n" + "".join(f"{name},{replacement}\n" for name, replacement in rows),
+                    encoding="utf-8")
+    return str(path)
+
+
+def test_first_names_are_added(tmp_path):
+    anonymizer = NameAnonymizer.from_roster(write_roster(tmp_path / "roster.csv", [("Alex Smith", "P001")]))
+
+    assert anonymizer.anonymize("Alex Smith said Alex was late.") == "P001 said P001 was late."
+
+
+def test_titles_are_not_taken_for_first_names(tmp_path):
+    roster = write_roster(tmp_path / "roster.csv", [("Dr. Jones", "[Colleague]"), ("Prof Lee", "[Colleague]")])
+    anonymizer = NameAnonymizer.from_roster(roster)
+
+    assert anonymizer.anonymize("Dr. Jones met Dr. Smith and Prof Brown.") == \
+        "[Colleague] met Dr. Smith and Prof Brown."
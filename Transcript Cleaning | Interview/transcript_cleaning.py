@@ -1,20 +1,36 @@
 import os
 import re
+import sys
+import json
+import time
+import shutil
 import argparse
 import logging
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from docx import Document
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+from anonymization import NameAnonymizer
+from build_state import BuildState, file_digest
+from docx_stream import UnsupportedDocument, iter_paragraph_text, trimmed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import add_profile_arguments, init_worker_metrics, metrics, start_run, timed, timer
 
+LOG_FORMAT = '%(levelname)s: %(message)s'
+
+
+@timed
 def save_docx(file_name, entries):
     """
     Save transcript entries to a DOCX file.
 
     Args:
         file_name (str): Path to the output DOCX file.
-        entries (list): List of dictionaries containing transcript entries.
+        entries (iterable): Dictionaries containing transcript entries.
     """
     doc = Document()
     for entry in entries:
@@ -24,182 +40,566 @@ def save_docx(file_name, entries):
     doc.save(file_name)
 
 
+@timed
 def save_text(file_name, entries, include_metadata=False):
     """
     Save transcript entries to a plain text file.
 
     Args:
         file_name (str): Path to the output text file.
-        entries (list): List of dictionaries containing transcript entries.
+        entries (iterable): Dictionaries containing transcript entries.
         include_metadata (bool): If True, include speaker and timestamp metadata.
     """
-    with open(file_name, 'w') as file:
+    with open(file_name, 'w', encoding='utf-8') as file:
         for entry in entries:
             if include_metadata:
                 file.write(f'{entry["speaker"]} {entry["time"]} ')
             file.write(f'{entry["speech"]}\n')
-   
-    
-def name_replacement(text, name_to_replace, replacement):
+
+
+@timed
+def save_jsonl(file_name, entries, pid=None):
     """
-    Replace occurrences of a given name in the text with a replacement string.
+    Stream transcript entries to a JSON Lines file, one entry per line.
 
     Args:
-        text (str): The input text.
-        name_to_replace (str): The name to replace.
-        replacement (str): The string to replace with.
+        file_name (str): Path to the output JSONL file.
+        entries (iterable): Dictionaries containing transcript entries.
+        pid (str): Participant ID added to every line so files can be concatenated.
+    """
+    with open(file_name, 'w', encoding='utf-8') as file:
+        for entry in entries:
+            file.write(json.dumps(dict(pid=pid, **entry), ensure_ascii=False))
+            file.write('\n')
 
-    Returns:
-        str: The updated text with replacements.
+
+@timed
+def save_parquet(file_name, entries, pid=None, batch_size=10000):
     """
-    pattern = re.compile(r'\b' + re.escape(name_to_replace.split()[0]) + r'(?:\s+' + re.escape(" ".join(name_to_replace.split()[0][1:])) + r')?\b', re.IGNORECASE)
-    return pattern.sub(replacement, text)
+    Stream transcript entries to a Parquet file in row groups of `batch_size` entries.
 
+    Args:
+        file_name (str): Path to the output Parquet file.
+        entries (iterable): Dictionaries containing transcript entries.
+        pid (str): Participant ID stored in a `pid` column.
+        batch_size (int): Entries buffered per row group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in PARQUET_COLUMNS])
+    with pq.ParquetWriter(file_name, schema) as writer:
+        batch = {column: [] for column in PARQUET_COLUMNS}
+        for entry in entries:
+            batch['pid'].append(pid)
+            for column in PARQUET_COLUMNS[1:]:
+                batch[column].append(entry[column])
+            if len(batch['pid']) >= batch_size:
+                writer.write_table(pa.table(batch, schema=schema))
+                batch = {column: [] for column in PARQUET_COLUMNS}
+        if batch['pid']:
+            writer.write_table(pa.table(batch, schema=schema))
+
+
+PARQUET_COLUMNS = ['pid', 'speaker', 'time', 'speech']
 
+# Output format -> (file extension, writer(file_name, entries, pid))
+OUTPUT_FORMATS = {
+    'docx': ('.docx', lambda file_name, entries, pid: save_docx(file_name, entries)),
+    'txt': ('.txt', lambda file_name, entries, pid: save_text(file_name, entries, include_metadata=True)),
+    'jsonl': ('.jsonl', save_jsonl),
+    'parquet': ('.parquet', save_parquet),
+}
 
-def process_transcript(file_path):
+
+@timed
+def build_corpus(input_dir, output_format, corpus_path):
     """
-    Process a transcript file in DOCX format and extract cleaned transcript entries.
+    Concatenate every participant's cleaned output into one corpus file for bulk loading.
+
+    Text and JSONL outputs are copied byte for byte, Parquet outputs row group
+    by row group, so nothing is re-cleaned and memory stays flat.
 
     Args:
-        file_path (str): Path to the transcript DOCX file.
+        input_dir (str): The directory containing the cleaned transcripts.
+        output_format (str): 'txt', 'jsonl' or 'parquet'.
+        corpus_path (str): Path of the combined file.
 
     Returns:
-        list: A list of dictionaries containing speaker, standardized timestamp, and speech.
+        int: Number of participant files combined.
     """
-    # Extract PID and Name from the path
-    match = re.search(r'(P0\d+)', file_path)
-    pid = match.group(1) if match else None
+    extension = OUTPUT_FORMATS[output_format][0]
+    parts = sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(input_dir)
+        for file in files
+        if file.startswith('Interview_Transcript_') and file.endswith(extension)
+    )
+    tmp_path = f'{corpus_path}.tmp'
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column, pa.string()) for column in PARQUET_COLUMNS])
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for part in parts:
+                part_file = pq.ParquetFile(part)
+                for group in range(part_file.num_row_groups):
+                    writer.write_table(part_file.read_row_group(group))
+    else:
+        with open(tmp_path, 'wb') as corpus:
+            for part in parts:
+                with open(part, 'rb') as part_file:
+                    shutil.copyfileobj(part_file, corpus)
+    os.replace(tmp_path, corpus_path)
+    logging.info(f'Corpus of {len(parts)} transcripts saved to: {corpus_path}')
+    return len(parts)
+
 
-    match = re.search(r'-\s*(.*?).docx$', file_path)
-    name = match.group(1) if match else None
-        
-    # Open and read the document
-    try:
-        doc = Document(file_path)
-    except Exception as e:
-        logging.error(f"Error opening document {file_path}: {e}")
-        return []
     
-    # Step 1: Remove file's headings and footing by skipping first four and last paragraph
-    paragraphs = doc.paragraphs[4:-1]
+# Patterns are compiled once per run instead of once per paragraph
+ENTRY_PATTERN = re.compile(r"^(.+?) (\d{1,2}):(\d{2})(?::(\d{2}))? (.*)$")
+PID_PATTERN = re.compile(r'(P0\d+)')
+NAME_FROM_FILE_PATTERN = re.compile(r'-\s*(.*?).docx$')
+INTERVIEWER = "Hoorad Abootalebi"
+
+# Bump whenever the cleaning rules change so incremental runs rebuild every output
+CLEANER_VERSION = "2"
+STATE_FILE_NAME = ".transcript_cleaning_state.json"
+
+
+@lru_cache(maxsize=None)
+def compile_name_pattern(name_to_replace):
+    """
+    Compile the pattern matching a participant's name in speech (once per participant).
+
+    Args:
+        name_to_replace (str): The name to replace.
+
+    Returns:
+        re.Pattern: Case-insensitive pattern matching the name.
+    """
+    first_name = name_to_replace.split()[0]
+    return re.compile(r'\b' + re.escape(first_name) + r'(?:\s+' + re.escape(" ".join(first_name[1:])) + r')?\b', re.IGNORECASE)
+
+
+class TranscriptNormalizer:
+    """
+    Cleans the paragraphs of one participant's transcript in a single pass each:
+    whitespace collapsing, speaker/timestamp splitting, speaker and name
+    anonymization and timestamp standardization, all with precompiled patterns.
+    """
 
-    transcript = []
-    for para in paragraphs:
-        para_text = para.text.strip()
+    def __init__(self, pid, name=None, interviewer=INTERVIEWER, anonymizer=None):
+        """
+        Args:
+            pid (str): Participant ID used in place of the participant's name.
+            name (str): Participant's name as found in the file name, if any.
+            interviewer (str): Speaker label that is renamed to "Interviewer".
+            anonymizer (NameAnonymizer): Optional roster matcher for every other name in speech.
+        """
+        self.pid = pid
+        self.interviewer = interviewer
+        self.name_sub = compile_name_pattern(name).sub if name else None
+        self.anonymizer = anonymizer
+        # Timed on its own so the roster scan shows up apart from the rest of the cleaning
+        self.anonymize = timed(anonymizer.anonymize, name="transcript_cleaning.anonymize") if anonymizer else None
+
+    @timed
+    def normalize(self, para_text):
+        """
+        Turn one raw paragraph into a transcript entry.
+
+        Args:
+            para_text (str): Raw paragraph text ("Speaker  MM:SS  speech").
+
+        Returns:
+            dict or None: Entry with speaker, standardized timestamp and speech,
+            None for an empty paragraph. Raises ValueError for an unmatched one.
+        """
+        # Collapsing every whitespace run into one space also strips the ends
+        # and removes newlines, so no separate newline passes are needed
+        para_text = " ".join(para_text.split())
         if not para_text:
-            continue  # Skip empty paragraphs
-        
-        # Step 2: Fix spacing issues
-        para_text = re.sub(r'\s+', ' ', para_text)
-        para_text = re.sub(r'\n\s+', '\n', para_text)
-        para_text = re.sub(r'\s+\n', '\n', para_text)
-        para_text = re.sub(r'\n+', '\n', para_text)
-        
-        # Step 3: Extract by skipping first four and last paragraph
-        pattern = r"^(.+?)\s+(\d{1,2}:\d{2}(?::\d{2})?)\s+(.*)$"
-        match = re.match(pattern, para_text)
+            return None
+
+        match = ENTRY_PATTERN.match(para_text)
         if not match:
-            logging.warning(f"Line skipped due to unmatched format: {para_text}")
-            continue
-
-        speaker = match.group(1)
-        timestamp = match.group(2)
-        speech = match.group(3)
-        
-        # TO-DO: Replace first names in the speeches
-        # Replace speaker names based on PID and known interviewer name
+            raise ValueError(f"Line skipped due to unmatched format: {para_text}")
+        speaker, first, second, third, speech = match.groups()
+
         # If speaker is not the Interviewer, assign the PID value.
-        speaker = pid if speaker != "Hoorad Abootalebi" else "Interviewer"
-
-        # Replace the candidate's name in the speech with the PID for anonymity.
-        if name:
-            speech = name_replacement(speech, name, pid)
-        
-        # Step 5: Standardize timestamp (MM:SS or HH:MM:SS)
-        parts = timestamp.split(':')
-        if len(parts) == 2:
-            # If it's mm:ss, assume hours = 0
-            minute, second = parts
-            hour = 0
-        elif len(parts) == 3:
-            # If it's hh:mm:ss, unpack accordingly
-            hour, minute, second = parts
+        speaker = self.pid if speaker != self.interviewer else "Interviewer"
+
+        # Replace roster names (colleagues, interviewer, other participants...), then
+        # the candidate's own name in the speech with the PID for anonymity.
+        if self.anonymize is not None:
+            speech = self.anonymize(speech)
+        if self.name_sub is not None:
+            speech = self.name_sub(self.pid, speech)
+
+        # Standardize timestamp (MM:SS or HH:MM:SS)
+        if third is None:
+            hour, minute, second = 0, first, second
         else:
-            raise ValueError("Timestamp format not recognized")
-
-        standardized_timestamp = f"{int(hour):02d}:{int(minute):02d}:{int(second):02d}"
-        
-        # TO-DO: Find a filler word remover
-        # Step 6: Remove filler words (short snetences of interviewer)
-        # if speaker == "Interviewer" and len(speech) < 20:
-        #     filler_words.append(speech)
-        #     continue
-        # speech = filler_word_remover(speech)
-        
-        
-        # Step 7: Remove redundant or duplicated content
-        
-        
-        # Step 8: Fix puctuation
-        
-        
-        # Create dictionary for this transcript entry
-        entry = {
-            'speaker': speaker, 
-            'time': standardized_timestamp, 
+            hour, minute, second = first, second, third
+
+        return {
+            'speaker': speaker,
+            'time': f"{int(hour):02d}:{int(minute):02d}:{int(second):02d}",
             'speech': speech
         }
-        transcript.append(entry)
-    return transcript
-    
+
+
+def read_paragraphs(file_path):
+    """
+    Lazily read the body paragraphs of a transcript DOCX file.
+
+    Paragraphs are streamed out of the package with an incremental XML parser
+    instead of loading python-docx's object model. Files the streaming reader
+    cannot handle fall back to python-docx, picking up where the stream stopped.
+
+    Args:
+        file_path (str): Path to the transcript DOCX file.
+
+    Yields:
+        str: Paragraph texts, without the file's headings (first four paragraphs) and footing (last paragraph).
+    """
+    yielded = 0
+    try:
+        for text in trimmed(iter_paragraph_text(file_path), skip_head=4, skip_tail=1):
+            yield text
+            yielded += 1
+        return
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, UnsupportedDocument) as e:
+        logging.warning(f"Falling back to python-docx for {file_path}: {type(e).__name__}: {e}")
+
+    doc = Document(file_path)
+    for para in doc.paragraphs[4:-1][yielded:]:
+        yield para.text
+
+
+def iter_transcript(file_path, stats=None, anonymizer=None):
+    """
+    Lazily extract cleaned transcript entries from a transcript file in DOCX format.
+
+    Args:
+        file_path (str): Path to the transcript DOCX file.
+        stats (Counter): Optional counter updated with skipped lines and per-stage seconds.
+        anonymizer (NameAnonymizer): Optional roster matcher applied to every speech.
+
+    Yields:
+        dict: Speaker, standardized timestamp, and speech of one entry.
+
+    Raises:
+        Exception: Whatever python-docx raises if the document cannot be opened.
+    """
+    if stats is None:
+        stats = Counter()
+
+    # Extract PID and Name from the path
+    match = PID_PATTERN.search(file_path)
+    pid = match.group(1) if match else None
+
+    match = NAME_FROM_FILE_PATTERN.search(file_path)
+    name = match.group(1) if match else None
+
+    # Step 1: Stream the document's paragraphs, skipping the file's headings and footing
+    paragraphs = read_paragraphs(file_path)
+
+    # Step 2: Fix spacing, split speaker/timestamp/speech, anonymize and standardize timestamps
+    # TO-DO: Find a filler word remover, remove redundant content, fix punctuation
+    normalizer = TranscriptNormalizer(pid, name, anonymizer=anonymizer)
+    while True:
+        start = time.perf_counter()
+        para_text = next(paragraphs, None)
+        parsed = time.perf_counter()
+        stats['parse_seconds'] += parsed - start
+        if para_text is None:
+            return
+        try:
+            entry = normalizer.normalize(para_text)
+        except ValueError as e:
+            logging.warning(str(e))
+            stats['skipped_lines'] += 1
+            entry = None
+        stats['clean_seconds'] += time.perf_counter() - parsed
+        if entry is not None:
+            yield entry
+
+
+@timed
+def process_transcript(file_path, stats=None, anonymizer=None):
+    """
+    Process a transcript file in DOCX format and extract cleaned transcript entries.
+
+    Args:
+        file_path (str): Path to the transcript DOCX file.
+        stats (Counter): Optional counter updated with skipped lines and per-stage seconds.
+        anonymizer (NameAnonymizer): Optional roster matcher applied to every speech.
+
+    Returns:
+        list: A list of dictionaries containing speaker, standardized timestamp, and speech.
+
+    Raises:
+        Exception: Whatever python-docx raises if the document cannot be opened.
+    """
+    return list(iter_transcript(file_path, stats, anonymizer))
+
+
+def add_arguments(parser):
+    """
+    Add the transcript cleaning options to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The script's or the toolkit CLI's parser.
+
+    Returns:
+        argparse.ArgumentParser: The same parser.
+    """
+    parser.add_argument('--input_dir', type=str, default='../data/Recordings', help="Directory containing the transcript files.")
+    parser.add_argument('--start_with', type=str, default='Interview_ Social and Cultural Observations on Practices in Cybersecurity Engagement (SCOPE)', help="The pattern that transcript file names start with.")
+    parser.add_argument('--roster', type=str, default=None, help="CSV of names (Name,Replacement) to anonymize in every transcript.")
+    parser.add_argument('--incremental', action='store_true', help="Rebuild only transcripts whose content, or the cleaning rules, changed since the last run.")
+    parser.add_argument('--format', type=str, choices=sorted(OUTPUT_FORMATS), default='docx', help="Output format of the cleaned transcripts.")
+    parser.add_argument('--corpus', type=str, default=None, help="Also combine all cleaned transcripts into this file (txt, jsonl or parquet formats).")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes parsing and cleaning transcripts in parallel.")
+    return parser
+
 
 def parse_arguments():
     """
     Parse command-line arguments.
 
     Returns:
-        argparse.Namespace: Parsed arguments including input directory and file name pattern.
+        argparse.Namespace: Parsed arguments including input directory, file name pattern and worker count.
     """
     parser = argparse.ArgumentParser(description="Process transcript files from a specified directory.")
+    add_arguments(parser)
+    add_profile_arguments(parser)
     
-    parser.add_argument('--input_dir', type=str, default='../data/Recordings', help="Directory containing the transcript files.")
-    parser.add_argument('--start_with', type=str, default='Interview_ Social and Cultural Observations on Practices in Cybersecurity Engagement (SCOPE)', help="The pattern that transcript file names start with.")
-    
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.corpus and args.format == 'docx':
+        parser.error("--corpus needs --format txt, jsonl or parquet")
+    return args
 
-def process_directory(input_dir, start_with):
+
+# Roster matcher of the current process, built once by the parent and handed to
+# each worker process when it starts instead of once per transcript
+_anonymizer = None
+
+
+def init_worker(anonymizer):
     """
-    Walk through the given directory, process each transcript file, and save the cleaned transcript.
+    Install the shared roster matcher in a worker process.
+
+    Args:
+        anonymizer (NameAnonymizer): The matcher built by the parent process, or None.
+    """
+    global _anonymizer
+    _anonymizer = anonymizer
+    init_worker_metrics()
+
+
+def clean_transcript_job(file_path, output_file_path, output_format='docx'):
+    """
+    Parse, clean and save one transcript, capturing failures instead of raising
+    so a bad file cannot take down the rest of the batch. Runs inside a worker
+    process, so the work of writing the output is parallel too. Entries are
+    streamed from the cleaner straight into the writer.
+
+    Args:
+        file_path (str): Path to the transcript DOCX file.
+        output_file_path (str): Path of the cleaned file to write.
+        output_format (str): One of OUTPUT_FORMATS.
+
+    Returns:
+        tuple: (file_path, stats Counter, error message or None, instrumentation snapshot or None).
+    """
+    stats = Counter()
+    writer = OUTPUT_FORMATS[output_format][1]
+    match = PID_PATTERN.search(output_file_path)
+    pid = match.group(1) if match else None
+
+    def counted(entries):
+        for entry in entries:
+            stats['entries'] += 1
+            yield entry
+
+    # Written beside the output and moved into place only once complete, so a
+    # failed rebuild leaves the previous good output untouched
+    tmp_path = f'{output_file_path}.tmp'
+    try:
+        start = time.perf_counter()
+        with timer("transcript_cleaning.clean_transcript_job"):
+            writer(tmp_path, counted(iter_transcript(file_path, stats, anonymizer=_anonymizer)), pid)
+        os.replace(tmp_path, output_file_path)
+        # Cleaning runs inside the writer's loop; count only the writer's own time as saving
+        stats['save_seconds'] += time.perf_counter() - start - stats['parse_seconds'] - stats['clean_seconds']
+        error = None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        error = f"{type(e).__name__}: {e}"
+    # Taken after the job's own timer closed, so the snapshot includes it
+    return file_path, stats, error, metrics.snapshot(reset=True) if metrics.enabled else None
+
+
+def find_transcripts(input_dir, start_with, state=None, rules=None, output_format='docx'):
+    """
+    Walk through the given directory and list the transcripts still to be cleaned.
+
+    Without a state, a transcript is cleaned only if its output does not exist
+    yet. With one, it is cleaned whenever its content or the cleaning rules
+    changed since it was last built, and skipped otherwise.
 
     Args:
         input_dir (str): The directory containing transcript files.
         start_with (str): The starting pattern of transcript file names.
+        state (BuildState): Optional incremental build state.
+        rules (str): Fingerprint of the cleaning rules, used with `state`.
+        output_format (str): One of OUTPUT_FORMATS, deciding the output file extension.
+
+    Returns:
+        tuple: (list of (transcript path, participant ID, output path), number of transcripts already cleaned,
+        dict of transcript path -> fingerprint to record in the state).
     """
+    jobs = []
+    existing = 0
+    fingerprints = {}
     for root, dirs, files in os.walk(input_dir):
         for file in files:
             if file.startswith(start_with) and file.endswith(".docx"):
                 # Extract PID and Name from the path
-                match = re.search(r'(P0\d+)', root)
+                match = PID_PATTERN.search(root)
                 pid = match.group(1) if match else None
 
-                logging.info(f'Working on participant: {pid}')
-                logging.info(f'\tOpening file: {file}')
-        
-                transcript_file_path = os.path.join(root, file)
-                clean_transcript = process_transcript(transcript_file_path)
-                
                 # Define the output file path for the cleaned transcript
-                output_file_path = f'{root}/Interview_Transcript_{pid}.docx'
+                output_file_path = f'{root}/Interview_Transcript_{pid}{OUTPUT_FORMATS[output_format][0]}'
+                transcript_file_path = os.path.join(root, file)
+                if state is not None:
+                    needs_build, fingerprint = state.needs_build(transcript_file_path, output_file_path, rules)
+                    if not needs_build:
+                        existing += 1
+                        continue
+                    fingerprints[transcript_file_path] = fingerprint
+                elif os.path.exists(output_file_path):
+                    logging.info(f'File already exists: {output_file_path}')
+                    existing += 1
+                    continue
+                jobs.append((transcript_file_path, pid, output_file_path))
+    return jobs, existing, fingerprints
 
-                logging.info(f'\tSaving file...')
-                if not os.path.exists(output_file_path):
-                    save_docx(output_file_path, clean_transcript)
-                    logging.info(f'\t\tFile saved successfully: {output_file_path}')
-                else:
-                    logging.info(f'\t\tFile already exists: {output_file_path}')
 
-                logging.info('*------------------------------------------------------------------------------*\n')
+def process_directory(input_dir, start_with, workers=1, roster=None, incremental=False,
+                      output_format='docx', corpus=None):
+    """
+    Walk through the given directory, process each transcript file, and save the cleaned transcript.
+
+    With more than one worker, transcripts are parsed, cleaned and saved in a
+    process pool and reported as soon as each one finishes. A file that fails
+    is logged and counted, and the rest of the batch carries on.
+
+    In incremental mode a state file in `input_dir` records what every output
+    was built from, so only new or changed transcripts are opened at all.
+
+    Args:
+        input_dir (str): The directory containing transcript files.
+        start_with (str): The starting pattern of transcript file names.
+        workers (int): Number of worker processes.
+        roster (str): Optional roster CSV of names to anonymize.
+        incremental (bool): Rebuild only outputs whose source or cleaning rules changed.
+        output_format (str): One of OUTPUT_FORMATS.
+        corpus (str): Optional path of a combined file of all participants (not for docx).
+
+    Returns:
+        Counter: Run summary (files, entries, skipped lines, failures and per-stage seconds).
+    """
+    run_start = time.perf_counter()
+    state = rules = None
+    if incremental:
+        state = BuildState(os.path.join(input_dir, STATE_FILE_NAME))
+        rules = f"{CLEANER_VERSION}:{output_format}:{file_digest(roster) if roster else ''}"
+    jobs, existing, fingerprints = find_transcripts(input_dir, start_with, state, rules, output_format)
+    outputs = {path: (pid, output_file_path) for path, pid, output_file_path in jobs}
+    summary = Counter(files_found=len(jobs) + existing, files_existing=existing)
+    anonymizer = NameAnonymizer.from_roster(roster) if roster else None
+
+    def log_result(result):
+        file_path, stats, error, worker_metrics = result
+        pid, output_file_path = outputs[file_path]
+        summary.update(stats)
+        metrics.merge(worker_metrics)
+        logging.info(f'Working on participant: {pid}')
+        logging.info(f'\tOpened file: {os.path.basename(file_path)}')
+        if error is not None:
+            logging.error(f'\tFailed to process {file_path}: {error}')
+            summary['files_failed'] += 1
+        else:
+            summary['files_cleaned'] += 1
+            if state is not None:
+                state.record(file_path, output_file_path, rules, fingerprints[file_path])
+            logging.info(f'\t\tFile saved successfully: {output_file_path}')
+        logging.info('*------------------------------------------------------------------------------*\n')
+
+    try:
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(anonymizer,)) as pool:
+                futures = [pool.submit(clean_transcript_job, path, output_file_path, output_format)
+                           for path, _, output_file_path in jobs]
+                for future in as_completed(futures):
+                    log_result(future.result())
+        else:
+            init_worker(anonymizer)
+            for path, _, output_file_path in jobs:
+                log_result(clean_transcript_job(path, output_file_path, output_format))
+    finally:
+        if state is not None:
+            state.save()
+
+    if corpus:
+        start = time.perf_counter()
+        build_corpus(input_dir, output_format, corpus)
+        summary['corpus_seconds'] += time.perf_counter() - start
+
+    summary['elapsed_seconds'] = time.perf_counter() - run_start
+    metrics.update("transcripts", summary)
+    log_summary(summary)
+    return summary
+
+
+def log_summary(summary):
+    """
+    Log the totals of a run.
+
+    Args:
+        summary (Counter): Run summary as returned by process_directory.
+    """
+    logging.info(f"Files: {summary['files_found']} found, {summary['files_cleaned']} cleaned, "
+                 f"{summary['files_existing']} already cleaned, {summary['files_failed']} failed")
+    logging.info(f"Entries: {summary['entries']} written, {summary['skipped_lines']} lines skipped")
+    logging.info(f"Time: parse {summary['parse_seconds']:.2f}s, clean {summary['clean_seconds']:.2f}s, "
+                 f"save {summary['save_seconds']:.2f}s (summed over files), corpus {summary['corpus_seconds']:.2f}s, "
+                 f"{summary['elapsed_seconds']:.2f}s elapsed")
+
+
+def run(args, table=None, final=True):
+    """
+    Clean the directory of transcript files named by parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Options added by add_arguments.
+        table: Output of a previous pipeline stage; transcripts are read from disk, so it is unused.
+        final (bool): Whether this is the last pipeline stage; the cleaned files are always written.
+
+    Returns:
+        Counter: The run summary of process_directory.
+    """
+    if args.corpus and args.format == 'docx':
+        raise SystemExit("error: --corpus needs --format txt, jsonl or parquet")
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    return process_directory(args.input_dir, args.start_with, args.workers, args.roster, args.incremental,
+                             args.format, args.corpus)
 
 
 def main():
@@ -207,7 +607,8 @@ def main():
     Main function to parse arguments and process the directory of transcript files.
     """
     args = parse_arguments()
-    process_directory(args.input_dir, args.start_with)
+    start_run("clean-transcripts", args.profile, args.profile_report)
+    run(args)
 
 
 if __name__ == "__main__":
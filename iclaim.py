@@ -0,0 +1,140 @@
+"""
+Single entry point for the I-CLAIM scripts.
+
+    python iclaim.py <command> [options]
+    python iclaim.py <command> --help
+
+Only the script behind the chosen command is imported, so the CLI starts in
+milliseconds and a command never pays for pandas, python-docx or the Flux
+client it does not use. Each command takes the same options as its script.
+
+Commands joined with "+" run as one pipeline in one process. A stage without
+an explicit input receives the previous stage's table in memory (the
+"Overall Frequency" sheet after frequencies), and intermediate stages only
+write files when given an --output. A chain where a stage would receive an
+output it cannot use (e.g. join-codebook after frequencies) is rejected
+before anything runs:
+
+    python iclaim.py split-codes --input "Literature Review - Codes.xlsx" \\
+        + frequencies --cooccurrence quote + themes --themes code_theme_mapping.xlsx
+
+Options before the first command apply to the whole run (--profile, --profile_report).
+"""
+import os
+import sys
+import argparse
+import importlib
+
+from instrumentation import add_profile_arguments, start_run, timer
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGE_SEPARATOR = "+"
+
+# Command -> (folder, module, summary); every module provides add_arguments(parser) and run(args, table, final)
+COMMANDS = {
+    "clean-transcripts": ("Transcript Cleaning | Interview", "transcript_cleaning",
+                          "Clean and anonymize the interview transcripts of a directory."),
+    "split-codes": ("Code Exporting | Survey", "preprocessing", "Split semicolon-separated codes into one row per code."),
+    "frequencies": ("Code Exporting | Survey", "frequencies", "Count code frequencies overall and by paper."),
+    "join-codebook": ("Qualitative Analysis | Focus Group", "join_code_book",
+                      "Join the code book frequencies with the code dictionary."),
+    "themes": ("Code Exporting | Survey", "theme_analysis", "Look up the theme of every code in the code frequency table."),
+    "gen-prompts": ("Dataset Construction", "prompts_script", "Generate face prompts and their Flux images."),
+}
+
+# Command -> (option naming its input table, commands whose output it can take instead);
+# commands without an input option take no table
+CONSUMES = {
+    "clean-transcripts": (None, ()),
+    "split-codes": ("input", ()),
+    "frequencies": ("input", ("split-codes",)),
+    "join-codebook": ("frequencies", ()),   # needs per-coder counts, which no stage produces
+    "themes": ("frequencies", ("frequencies",)),
+    "gen-prompts": (None, ()),
+}
+# Sheet handed on by commands that produce several named tables
+OUTPUT_SHEET = {"frequencies": "Overall Frequency"}
+
+
+def load_command(name):
+    """Import the script behind a command."""
+    folder, module, _ = COMMANDS[name]
+    path = os.path.join(ROOT_DIR, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def split_stages(argv):
+    """Split command-line arguments at every '+' into one argument list per stage."""
+    stages = [[]]
+    for arg in argv:
+        if arg == STAGE_SEPARATOR:
+            stages.append([])
+        else:
+            stages[-1].append(arg)
+    return stages
+
+
+def check_chain(stages):
+    """
+    Error message for the first stage that would take its input from a
+    previous stage whose output it cannot consume, or None when the chain is valid.
+    """
+    for (previous, _, _), (name, _, args) in zip(stages, stages[1:]):
+        option, accepted = CONSUMES[name]
+        if option is None or getattr(args, option) or previous in accepted:
+            continue
+        return f"stage '{name}' cannot consume the output of '{previous}'; pass --{option}"
+    return None
+
+
+def stage_input(name, previous, table):
+    """The previous stage's output in the form `name` consumes, or None when it takes none from it."""
+    if previous not in CONSUMES[name][1]:
+        return None
+    if previous in OUTPUT_SHEET:
+        return table[OUTPUT_SHEET[previous]]
+    return table
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    epilog = "commands:\n" + "\n".join(f"  {name:<18} {summary}" for name, (_, _, summary) in COMMANDS.items())
+    parser = argparse.ArgumentParser(prog="iclaim", usage="%(prog)s [--profile [MODES]] command [options] [+ command [options] ...]",
+                                     description="Run one I-CLAIM command, or several chained in memory with '+'.",
+                                     epilog=epilog, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_profile_arguments(parser)
+
+    # Run-wide options are everything before the first command
+    first = next((i for i, arg in enumerate(argv) if arg in COMMANDS), len(argv))
+    options = parser.parse_args(argv[:first])
+    if first == len(argv):
+        parser.print_help()
+        return 2
+
+    stages = []
+    for stage in split_stages(argv[first:]):
+        if not stage or stage[0] not in COMMANDS:
+            parser.error(f"expected a command after '{STAGE_SEPARATOR}', one of: {', '.join(COMMANDS)}")
+        name = stage[0]
+        module = load_command(name)
+        command_parser = argparse.ArgumentParser(prog=f"iclaim {name}", description=COMMANDS[name][2])
+        module.add_arguments(command_parser)
+        stages.append((name, module, command_parser.parse_args(stage[1:])))
+
+    error = check_chain(stages)
+    if error:
+        parser.error(error)
+
+    start_run("+".join(name for name, _, _ in stages), options.profile, options.profile_report)
+    table, previous = None, None
+    for i, (name, module, args) in enumerate(stages):
+        with timer(f"iclaim.{name}"):
+            table = module.run(args, stage_input(name, previous, table), final=i == len(stages) - 1)
+        previous = name
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
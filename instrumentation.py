@@ -0,0 +1,337 @@
+"""
+Run instrumentation shared by the I-CLAIM scripts.
+
+Hot functions are wrapped with `timed`, and stages can be timed with
+`timer(...)` blocks. Counters record how much work was done. While a run is
+instrumented, a background thread samples resident memory. At the end of the
+run a JSON report is written, with every timer (calls, total, mean and max
+seconds), the counters, peak RSS and, optionally, the top cProfile functions
+and tracemalloc allocation sites.
+
+Instrumentation is off unless enabled for the run, either with a script's
+`--profile` flag or with the ICLAIM_PROFILE environment variable, set to a
+comma-separated list of:
+
+    metrics      timers, counters and RSS sampling (implied by the others)
+    cprofile     function-level CPU profile of the main thread (also saved as a .prof file)
+    tracemalloc  top Python allocation sites
+
+ICLAIM_PROFILE_REPORT overrides where the JSON report is written. When off,
+a timed function costs one extra call and a flag check, and the profilers
+are not even imported.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+import contextlib
+from datetime import datetime
+
+PROFILE_ENV = "ICLAIM_PROFILE"
+REPORT_ENV = "ICLAIM_PROFILE_REPORT"
+MODES = ("metrics", "cprofile", "tracemalloc")
+
+# Seconds between resident memory samples
+RSS_INTERVAL = 0.05
+
+
+def parse_modes(value):
+    """Modes named in a --profile / ICLAIM_PROFILE value ('1' or 'all' enable everything)."""
+    if not value:
+        return set()
+    names = {name.strip().lower() for name in str(value).split(",") if name.strip()}
+    if names & {"1", "true", "yes", "all"}:
+        return set(MODES)
+    unknown = names - set(MODES)
+    if unknown:
+        raise ValueError(f"Unknown profile mode(s): {', '.join(sorted(unknown))}; expected {', '.join(MODES)}")
+    return names | {"metrics"}
+
+
+def current_rss_bytes():
+    """Current resident set size, from /proc where available, else the peak so far."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or 0 where it cannot be measured."""
+    try:
+        import resource  # Unix only
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return 0
+        memory = psutil.Process().memory_info()
+        # Windows keeps the peak working set; elsewhere fall back to the current size
+        return getattr(memory, "peak_wset", memory.rss)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metrics:
+    """Thread-safe timers and counters of the current process."""
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}        # name -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds, calls=1):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [calls, seconds, seconds]
+            else:
+                timer[0] += calls
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def update(self, prefix, values):
+        """Add every numeric value of a mapping (e.g. a run summary Counter) as `prefix.key` counters."""
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                self.count(f"{prefix}.{key}", value)
+
+    def snapshot(self, reset=False):
+        """Timers and counters as plain data, e.g. to send from a worker process to the parent."""
+        with self._lock:
+            data = {"timers": {name: list(timer) for name, timer in self.timers.items()},
+                    "counters": dict(self.counters)}
+            if reset:
+                self.timers.clear()
+                self.counters.clear()
+        return data
+
+    def merge(self, data):
+        """Fold in a snapshot taken in another process."""
+        if not data:
+            return
+        with self._lock:
+            for name, (calls, total, longest) in data["timers"].items():
+                timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+                timer[0] += calls
+                timer[1] += total
+                timer[2] = max(timer[2], longest)
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+metrics = Metrics()
+
+
+@contextlib.contextmanager
+def timer(name):
+    """Time a block under `name` when instrumentation is on."""
+    if not metrics.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(name, time.perf_counter() - start)
+
+
+def module_name(module):
+    """Name of a module for timer labels, using the script's file name for '__main__'."""
+    if module == "__main__":
+        main_file = getattr(sys.modules["__main__"], "__file__", None)
+        if main_file:
+            return os.path.splitext(os.path.basename(main_file))[0]
+    return module
+
+
+def timed(function=None, name=None):
+    """
+    Decorator timing every call of a function (under its qualified name by
+    default) when instrumentation is on. Usable bare or as @timed(name=...).
+    """
+    if function is None:
+        return functools.partial(timed, name=name)
+    label = name or f"{module_name(function.__module__)}.{function.__qualname__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.add_time(label, time.perf_counter() - start)
+
+    return wrapper
+
+
+def count(name, value=1):
+    """Add `value` to the counter `name` when instrumentation is on."""
+    metrics.count(name, value)
+
+
+class RssSampler(threading.Thread):
+    """Background thread tracking the peak of sampled resident memory."""
+
+    def __init__(self, interval=RSS_INTERVAL):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+class Run:
+    """One instrumented run: turns metrics on, starts the requested profilers and writes the report."""
+
+    def __init__(self, name, modes, report_path=None):
+        self.name = name
+        self.modes = modes
+        self.pid = os.getpid()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.report_path = report_path or os.environ.get(REPORT_ENV) or f"run_report_{name}_{stamp}.json"
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.start = time.perf_counter()
+        self.sampler = RssSampler()
+        self.profiler = None
+        if "cprofile" in modes:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        self.finished = False
+
+        metrics.enabled = True
+        # Worker processes started from here inherit the setting
+        os.environ[PROFILE_ENV] = ",".join(sorted(modes))
+        self.sampler.start()
+        if "tracemalloc" in modes:
+            import tracemalloc
+            tracemalloc.start(10)
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def finish(self):
+        """Stop profiling and write the JSON report; returns its path."""
+        if self.finished:
+            return self.report_path
+        self.finished = True
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.sampler.stop()
+
+        data = metrics.snapshot()
+        report = {
+            "run": self.name,
+            "argv": sys.argv,
+            "started": self.started,
+            "wall_seconds": time.perf_counter() - self.start,
+            "cpu_seconds": time.process_time(),
+            "peak_rss_mb": max(self.sampler.peak, peak_rss_bytes()) / 1024 ** 2,
+            "rss_samples": self.sampler.samples,
+            "timers": {
+                name: {"calls": calls, "total_seconds": total, "mean_seconds": total / calls, "max_seconds": longest}
+                for name, (calls, total, longest) in sorted(data["timers"].items(), key=lambda item: -item[1][1])
+            },
+            "counters": data["counters"],
+        }
+        if self.profiler is not None:
+            profile_path = f"{os.path.splitext(self.report_path)[0]}.prof"
+            self.profiler.dump_stats(profile_path)
+            report["cprofile"] = {"file": profile_path, "top": top_functions(self.profiler)}
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            report["tracemalloc"] = {
+                "peak_mb": tracemalloc.get_traced_memory()[1] / 1024 ** 2,
+                "top": [{"site": str(stat.traceback[0]), "size_kb": stat.size / 1024, "count": stat.count}
+                        for stat in snapshot.statistics("lineno")[:20]],
+            }
+            tracemalloc.stop()
+
+        tmp_path = f"{self.report_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, default=str)
+        os.replace(tmp_path, self.report_path)
+        metrics.enabled = False
+        print(f"Run report written to {self.report_path}", file=sys.stderr)
+        return self.report_path
+
+
+def top_functions(profiler, limit=30):
+    """The `limit` functions with the most cumulative time in a cProfile run."""
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (file_name, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(file_name)}:{line}({function})", "calls": calls,
+                     "total_seconds": total, "cumulative_seconds": cumulative})
+    rows.sort(key=lambda row: -row["cumulative_seconds"])
+    return rows[:limit]
+
+
+_run = None
+
+
+def start_run(name, profile=None, report_path=None):
+    """
+    Instrument the rest of this run if `profile` (a --profile value) or
+    ICLAIM_PROFILE asks for it. The report is written when the process exits,
+    or earlier with finish_run(). Returns the Run, or None when off.
+    """
+    global _run
+    modes = parse_modes(profile) or parse_modes(os.environ.get(PROFILE_ENV))
+    if not modes or _run is not None:
+        return _run
+    _run = Run(name, modes, report_path)
+    atexit.register(finish_run)
+    return _run
+
+
+def finish_run():
+    """Write the report of the current run, if any; returns its path."""
+    return _run.finish() if _run is not None else None
+
+
+def init_worker_metrics():
+    """
+    Start a worker process with empty metrics, on when its parent run is
+    instrumented. Workers hand theirs back with metrics.snapshot(reset=True).
+    Does nothing in the process that started the run.
+    """
+    if _run is not None and _run.pid == os.getpid():
+        return metrics.enabled
+    metrics.snapshot(reset=True)
+    metrics.enabled = bool(parse_modes(os.environ.get(PROFILE_ENV)))
+    return metrics.enabled
+
+
+def add_profile_arguments(parser):
+    """Add the --profile / --profile_report options to a script's argument parser."""
+    parser.add_argument('--profile', nargs='?', const='metrics', default=None,
+                        help=f"Write a JSON run report; optionally a comma-separated list of {', '.join(MODES)}.")
+    parser.add_argument('--profile_report', default=None, help="Path of the JSON run report.")
+    return parser
@@ -0,0 +1,561 @@
+"""
+Full-text search over the interview transcripts and the literature quotes.
+
+Transcript entries (from process_transcript) and quotes of the cleaned
+Ref./Code/Quote table (from clean_and_split_codes) are indexed into one
+on-disk inverted index ranked with BM25:
+
+    python search_index.py build --index search --transcripts ../data/Recordings \\
+        --table "Code Exporting | Survey/Literature Review - Codes & Quotes.parquet"
+    python search_index.py search --index search '"identity theft" password code:"Identity Theft"'
+    python search_index.py update --index search
+
+Queries are free terms (ranked, any may match), "quoted phrases" (must occur
+as written) and field filters: pid:P001, ref:Farooq (substring of the
+reference), code:"identity theft" (code name, case/spacing-insensitive) and
+kind:transcript or kind:literature.
+
+Layout of the index directory:
+
+    sources.json        registered transcript folders and tables
+    state.json          per-file fingerprints (see build_state.BuildState)
+    segments/           tokenized documents of each source file
+    CURRENT             name of the live generation directory
+    gen-NNNNNN/         the merged index: numpy arrays opened memory-mapped,
+                        stored documents, and meta.json
+
+Updating re-reads only files whose content changed, then merges every
+segment into a new generation and switches CURRENT atomically, so readers
+never see a half-written index.
+"""
+import os
+import re
+import sys
+import json
+import time
+import glob
+import shutil
+import pickle
+import hashlib
+import logging
+import argparse
+from collections import Counter
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Transcript Cleaning | Interview"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Code Exporting | Survey"))
+from build_state import BuildState
+from codebook import normalize_code
+
+# Bump whenever tokenization or the segment layout changes so every source is re-read
+INDEX_VERSION = "1"
+DEFAULT_START_WITH = 'Interview_ Social and Cultural Observations on Practices in Cybersecurity Engagement (SCOPE)'
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r'(\w+):"([^"]*)"|(\w+):(\S+)|"([^"]*)"|(\S+)')
+FILTER_FIELDS = ("pid", "ref", "code", "kind")
+KINDS = ("transcript", "literature")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Lower-cased word tokens of `text`."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def term_hash(term):
+    """Stable 64-bit key of a term; the index stores these instead of the strings."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# ---------------------------------------------------------------------------
+# Reading sources
+# ---------------------------------------------------------------------------
+
+def transcript_documents(file_path):
+    """One document per cleaned entry of a transcript DOCX file."""
+    from transcript_cleaning import PID_PATTERN, process_transcript
+
+    match = PID_PATTERN.search(file_path)
+    pid = match.group(1) if match else None
+    return [{"kind": "transcript", "pid": pid, "speaker": entry["speaker"], "time": entry["time"],
+             "text": entry["speech"]} for entry in process_transcript(file_path)]
+
+
+def table_documents(file_path):
+    """One document per quote of a cleaned Ref./Code/Quote table, with all of the quote's codes."""
+    from table_io import read_table
+
+    df = read_table(file_path)
+    df = df[df["Quote"].notna()]
+    quotes = {}
+    for ref, code, quote in zip(df["Ref."].tolist(), df["Code"].tolist(), df["Quote"].tolist()):
+        ref = ref if isinstance(ref, str) else None
+        codes = quotes.setdefault((ref, str(quote)), set())
+        if isinstance(code, str):
+            codes.add(code)
+    return [{"kind": "literature", "ref": ref, "codes": sorted(codes), "text": quote}
+            for (ref, quote), codes in quotes.items()]
+
+
+def list_transcripts(directory, start_with=DEFAULT_START_WITH):
+    """Raw transcript files under `directory`, as process_directory finds them."""
+    return sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(directory)
+        for file in files
+        if file.startswith(start_with) and file.endswith(".docx") and not file.startswith("Interview_Transcript_")
+    )
+
+
+def build_segment(documents, source):
+    """Tokenize the documents of one source file into a segment."""
+    vocab = {}
+    tokens = []
+    offsets = [0]
+    for document in documents:
+        document["source"] = source
+        tokens.extend(vocab.setdefault(token, len(vocab)) for token in tokenize(document["text"]))
+        offsets.append(len(tokens))
+    return {
+        "vocab": list(vocab),
+        "tokens": np.array(tokens, dtype=np.int32),
+        "offsets": np.array(offsets, dtype=np.int64),
+        "documents": documents,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Building and updating
+# ---------------------------------------------------------------------------
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_json(path, default):
+    if not os.path.isfile(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_segments(segments, output_dir):
+    """
+    Merge tokenized segments into the memory-mappable arrays of one index generation.
+
+    Every token becomes a (term, document, position) triple; one lexsort groups
+    them into postings (term, document, term frequency) with their positions.
+    """
+    documents = [document for segment in segments for document in segment["documents"]]
+    vocabulary = sorted(set().union(*(segment["vocab"] for segment in segments))) if segments else []
+    hashes = np.array([term_hash(term) for term in vocabulary], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    if len(hashes) > 1 and (hashes[1:] == hashes[:-1]).any():
+        raise RuntimeError("64-bit term hash collision; bump INDEX_VERSION with a wider hash")
+    term_ids = np.empty(len(vocabulary), dtype=np.int64)
+    term_ids[order] = np.arange(len(vocabulary))
+    global_ids = dict(zip(vocabulary, term_ids.tolist()))
+
+    lengths = np.concatenate([np.diff(segment["offsets"]) for segment in segments]) if segments else np.zeros(0, np.int64)
+    terms = np.concatenate([np.array([global_ids[term] for term in segment["vocab"]], dtype=np.int64)[segment["tokens"]]
+                            for segment in segments]) if segments else np.zeros(0, np.int64)
+    docs = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64) if len(lengths) else lengths
+    positions = np.arange(len(terms), dtype=np.int64) - np.repeat(starts, lengths)
+
+    order = np.lexsort((positions, docs, terms))
+    terms, docs, positions = terms[order], docs[order], positions[order]
+    new_posting = np.ones(len(terms), dtype=bool)
+    new_posting[1:] = (terms[1:] != terms[:-1]) | (docs[1:] != docs[:-1])
+    posting_starts = np.flatnonzero(new_posting)
+    position_offsets = np.append(posting_starts, len(terms)).astype(np.int64)
+    posting_terms = terms[posting_starts]
+
+    os.makedirs(output_dir)
+    arrays = {
+        "term_hashes": hashes,
+        "term_offsets": np.searchsorted(posting_terms, np.arange(len(vocabulary) + 1)).astype(np.int64),
+        "posting_docs": docs[posting_starts].astype(np.int32),
+        "posting_tf": np.diff(position_offsets).astype(np.int32),
+        "position_offsets": position_offsets,
+        "positions": positions.astype(np.int32),
+        "doc_lengths": lengths.astype(np.int32),
+    }
+
+    # Filter fields: small value lists in meta.json, per-document ids in arrays
+    pids = sorted({document["pid"] for document in documents if document.get("pid")})
+    refs = sorted({document["ref"] for document in documents if document.get("ref")})
+    codes = sorted({code for document in documents for code in document.get("codes", ())})
+    pid_ids = {pid: i for i, pid in enumerate(pids)}
+    ref_ids = {ref: i for i, ref in enumerate(refs)}
+    code_ids = {code: i for i, code in enumerate(codes)}
+    arrays["doc_kind"] = np.array([KINDS.index(document["kind"]) for document in documents], dtype=np.int8)
+    arrays["doc_pid"] = np.array([pid_ids.get(document.get("pid"), -1) for document in documents], dtype=np.int32)
+    arrays["doc_ref"] = np.array([ref_ids.get(document.get("ref"), -1) for document in documents], dtype=np.int32)
+    code_docs = sorted((code_ids[code], doc) for doc, document in enumerate(documents) for code in document.get("codes", ()))
+    arrays["code_docs"] = np.array([doc for _, doc in code_docs], dtype=np.int32)
+    arrays["code_offsets"] = np.searchsorted(np.array([code for code, _ in code_docs], dtype=np.int64),
+                                             np.arange(len(codes) + 1)).astype(np.int64)
+
+    # Stored documents, read back only for the hits
+    doc_offsets = [0]
+    with open(os.path.join(output_dir, "documents.jsonl"), "wb") as f:
+        for document in documents:
+            doc_offsets.append(doc_offsets[-1] + f.write((json.dumps(document, ensure_ascii=False) + "\n").encode("utf-8")))
+    arrays["doc_offsets"] = np.array(doc_offsets, dtype=np.int64)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(output_dir, f"{name}.npy"), array)
+    _write_json(os.path.join(output_dir, "meta.json"), {
+        "version": INDEX_VERSION,
+        "documents": len(documents),
+        "terms": len(vocabulary),
+        "average_length": float(lengths.mean()) if len(lengths) else 0.0,
+        "pids": pids,
+        "refs": refs,
+        "codes": codes,
+    })
+
+
+def update_index(index_dir, transcripts=(), tables=(), start_with=None):
+    """
+    Register new sources and bring the index up to date with every registered one.
+
+    Only transcript and table files that are new or whose content changed are
+    read and tokenized again; files that disappeared are dropped. A file that
+    cannot be read is logged and counted as failed, and keeps the segment of
+    its last successful read. When anything changed, all segments are merged
+    into a new generation.
+
+    Returns:
+        Counter: Files indexed, unchanged, failed and removed, and documents in the index.
+    """
+    index_dir = os.path.abspath(index_dir)
+    os.makedirs(os.path.join(index_dir, "segments"), exist_ok=True)
+    sources_path = os.path.join(index_dir, "sources.json")
+    sources = _load_json(sources_path, {"transcripts": {}, "tables": []})
+    for directory in transcripts:
+        sources["transcripts"][os.path.abspath(directory)] = start_with or DEFAULT_START_WITH
+    for table in tables:
+        if os.path.abspath(table) not in sources["tables"]:
+            sources["tables"].append(os.path.abspath(table))
+    _write_json(sources_path, sources)
+
+    files = [(path, transcript_documents) for directory, prefix in sources["transcripts"].items()
+             for path in list_transcripts(directory, prefix)]
+    files += [(path, table_documents) for path in sources["tables"] if os.path.isfile(path)]
+
+    state = BuildState(os.path.join(index_dir, "state.json"))
+    summary = Counter()
+    live_segments = set()
+    for path, reader in files:
+        segment_path = os.path.join(index_dir, "segments", f"{hashlib.sha1(path.encode('utf-8')).hexdigest()}.pkl")
+        needs_build, fingerprint = state.needs_build(path, segment_path, INDEX_VERSION)
+        if not needs_build:
+            live_segments.add(segment_path)
+            summary["files_unchanged"] += 1
+            continue
+        try:
+            segment = build_segment(reader(path), source=path)
+        except Exception as e:
+            # One unreadable file must not block the index: keep its previous
+            # segment, if any, and retry it on the next update
+            logging.error(f"Failed to index {path}: {type(e).__name__}: {e}")
+            summary["files_failed"] += 1
+            if os.path.isfile(segment_path):
+                live_segments.add(segment_path)
+            continue
+        live_segments.add(segment_path)
+        tmp_path = f"{segment_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(segment, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, segment_path)
+        state.record(path, segment_path, INDEX_VERSION, fingerprint)
+        summary["files_indexed"] += 1
+
+    for segment_path in glob.glob(os.path.join(index_dir, "segments", "*.pkl")):
+        if segment_path not in live_segments:
+            os.remove(segment_path)
+            summary["files_removed"] += 1
+    state.files = {key: record for key, record in state.files.items()
+                   if os.path.join(index_dir, record["output"]) in live_segments}
+    state.save()
+
+    current = current_generation(index_dir)
+    if current is None or summary["files_indexed"] or summary["files_removed"]:
+        segments = []
+        for segment_path in sorted(live_segments):
+            with open(segment_path, "rb") as f:
+                segments.append(pickle.load(f))
+        number = int(current.split("-")[1]) + 1 if current else 1
+        generation = f"gen-{number:06d}"
+        merge_segments(segments, os.path.join(index_dir, generation))
+        with open(os.path.join(index_dir, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(os.path.join(index_dir, "CURRENT.tmp"), os.path.join(index_dir, "CURRENT"))
+        if current:
+            shutil.rmtree(os.path.join(index_dir, current), ignore_errors=True)
+        current = generation
+    summary["documents"] = _load_json(os.path.join(index_dir, current, "meta.json"), {}).get("documents", 0)
+    return summary
+
+
+def current_generation(index_dir):
+    """Name of the live generation directory, or None before the first build."""
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Searching
+# ---------------------------------------------------------------------------
+
+def parse_query(query):
+    """
+    Split a query into free terms, phrases (token lists) and filters.
+
+    Returns:
+        tuple: (list of terms, list of phrases, dict of field -> list of values).
+    """
+    terms, phrases, filters = [], [], {}
+    for field, quoted_value, field2, value, phrase, word in QUERY_PATTERN.findall(query):
+        field = (field or field2).lower()
+        if field in FILTER_FIELDS:
+            filters.setdefault(field, []).append(quoted_value or value)
+        elif phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        elif word:
+            terms.extend(tokenize(word))
+        else:
+            # Not a known field: search for the text as is
+            terms.extend(tokenize(f"{field} {quoted_value} {value}"))
+    return terms, phrases, filters
+
+
+class SearchIndex:
+    """Read-only view of the live generation of an index, with its arrays memory-mapped."""
+
+    def __init__(self, index_dir):
+        generation = current_generation(index_dir)
+        if generation is None:
+            raise FileNotFoundError(f"No index built in {index_dir}")
+        self.path = os.path.join(index_dir, generation)
+        self.meta = _load_json(os.path.join(self.path, "meta.json"), {})
+        self.arrays = {}
+        self.normalized_codes = None
+        self.documents_file = open(os.path.join(self.path, "documents.jsonl"), "rb")
+
+    def close(self):
+        self.documents_file.close()
+
+    def __getattr__(self, name):
+        # Arrays are mapped on first use, so a query only touches what it needs
+        if name.startswith("_") or name in ("arrays", "meta", "path", "normalized_codes"):
+            raise AttributeError(name)
+        if name not in self.arrays:
+            file_path = os.path.join(self.path, f"{name}.npy")
+            if not os.path.isfile(file_path):
+                raise AttributeError(name)
+            self.arrays[name] = np.load(file_path, mmap_mode="r")
+        return self.arrays[name]
+
+    def postings(self, term):
+        """(document ids, term frequencies, posting numbers) of `term`; empty when unknown."""
+        key = np.uint64(term_hash(term))
+        index = int(np.searchsorted(self.term_hashes, key))
+        if index == len(self.term_hashes) or self.term_hashes[index] != key:
+            return np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.int64)
+        start, end = int(self.term_offsets[index]), int(self.term_offsets[index + 1])
+        return np.asarray(self.posting_docs[start:end]), np.asarray(self.posting_tf[start:end]), np.arange(start, end)
+
+    def phrase_documents(self, tokens):
+        """Sorted ids of documents containing `tokens` consecutively."""
+        postings = [self.postings(token) for token in tokens]
+        candidates = postings[0][0]
+        for docs, _, _ in postings[1:]:
+            candidates = np.intersect1d(candidates, docs, assume_unique=True)
+        # Phrase starts as (document, position) keys: a start survives when every
+        # token of the phrase occurs at its offset from it in the same document
+        starts = None
+        for offset, (docs, _, numbers) in enumerate(postings):
+            numbers = numbers[np.isin(docs, candidates, assume_unique=True)]
+            begin, end = np.asarray(self.position_offsets[numbers]), np.asarray(self.position_offsets[numbers + 1])
+            lengths = end - begin
+            indices = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - begin, lengths)
+            keys = (np.repeat(np.asarray(self.posting_docs[numbers], dtype=np.int64), lengths) << 32) \
+                + np.asarray(self.positions[indices], dtype=np.int64) - offset
+            starts = keys if starts is None else np.intersect1d(starts, keys, assume_unique=True)
+            if not len(starts):
+                break
+        return np.unique(starts >> 32)
+
+    def filter_mask(self, filters):
+        """Boolean mask of the documents passing every filter, or None without filters."""
+        mask = None
+
+        def narrow(selected):
+            nonlocal mask
+            mask = selected if mask is None else mask & selected
+
+        if "kind" in filters:
+            kinds = [KINDS.index(kind.lower()) for kind in filters["kind"] if kind.lower() in KINDS]
+            narrow(np.isin(self.doc_kind, kinds))
+        if "pid" in filters:
+            wanted = {pid.upper() for pid in filters["pid"]}
+            narrow(np.isin(self.doc_pid, [i for i, pid in enumerate(self.meta["pids"]) if pid.upper() in wanted]))
+        if "ref" in filters:
+            needles = [ref.lower() for ref in filters["ref"]]
+            narrow(np.isin(self.doc_ref, [i for i, ref in enumerate(self.meta["refs"])
+                                          if any(needle in ref.lower() for needle in needles)]))
+        if "code" in filters:
+            if self.normalized_codes is None:
+                self.normalized_codes = {}
+                for i, code in enumerate(self.meta["codes"]):
+                    self.normalized_codes.setdefault(normalize_code(code), []).append(i)
+            selected = np.zeros(self.meta["documents"], dtype=bool)
+            for code in filters["code"]:
+                for code_id in self.normalized_codes.get(normalize_code(code), []):
+                    selected[self.code_docs[self.code_offsets[code_id]:self.code_offsets[code_id + 1]]] = True
+            narrow(selected)
+        return mask
+
+    def document(self, doc):
+        """Stored fields of one document."""
+        start, end = int(self.doc_offsets[doc]), int(self.doc_offsets[doc + 1])
+        self.documents_file.seek(start)
+        return json.loads(self.documents_file.read(end - start))
+
+    def search(self, query, k=10, filters=None):
+        """
+        Rank documents for `query` with BM25.
+
+        Args:
+            query (str): Terms, "phrases" and field:value filters.
+            k (int): Number of hits to return.
+            filters (dict): Extra field -> list of values filters, merged with the query's.
+
+        Returns:
+            list: Stored fields of the top `k` documents, each with its `score`.
+        """
+        terms, phrases, query_filters = parse_query(query)
+        for field, values in (filters or {}).items():
+            query_filters.setdefault(field, []).extend(values)
+
+        n = self.meta["documents"]
+        average_length = self.meta["average_length"] or 1.0
+        all_terms = terms + [token for phrase in phrases for token in phrase]
+
+        # BM25 contributions of every query term, summed per document
+        doc_lists, score_lists = [], []
+        for term, query_count in Counter(all_terms).items():
+            docs, tf, _ = self.postings(term)
+            if not len(docs):
+                continue
+            idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            lengths = self.doc_lengths[docs]
+            doc_lists.append(docs)
+            score_lists.append(query_count * idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths / average_length)))
+
+        mask = self.filter_mask(query_filters)
+        required = None
+        for phrase in phrases:
+            matched = self.phrase_documents(phrase)
+            required = matched if required is None else np.intersect1d(required, matched, assume_unique=True)
+
+        if doc_lists:
+            docs, inverse = np.unique(np.concatenate(doc_lists), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_lists))
+        elif all_terms:
+            docs, scores = np.zeros(0, np.int64), np.zeros(0)
+        else:
+            # Filters only: every matching document, in index order
+            docs = np.flatnonzero(mask) if mask is not None else np.arange(n)
+            scores = np.zeros(len(docs))
+        keep = np.ones(len(docs), dtype=bool)
+        if mask is not None:
+            keep &= mask[docs]
+        if required is not None:
+            keep &= np.isin(docs, required)
+        docs, scores = docs[keep], scores[keep]
+
+        if len(docs) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))
+        return [dict(self.document(int(docs[i])), score=float(scores[i])) for i in order]
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def format_hit(hit, width=200):
+    if hit["kind"] == "transcript":
+        where = f"{hit.get('pid')} {hit.get('speaker')} {hit.get('time')}"
+    else:
+        where = f"{hit.get('ref')} [{'; '.join(hit.get('codes', []))}]"
+    text = hit["text"] if len(hit["text"]) <= width else hit["text"][:width - 1] + "…"
+    return f"{hit['score']:7.3f}  {where}\n         {text}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over transcripts and literature quotes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("build", "Add sources and index them."), ("update", "Re-index changed sources.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--index", default="search_index", help="Index directory.")
+        if name == "build":
+            command.add_argument("--transcripts", nargs="*", default=[], help="Folders of raw interview transcripts.")
+            command.add_argument("--start_with", default=DEFAULT_START_WITH, help="The pattern that transcript file names start with.")
+            command.add_argument("--table", nargs="*", default=[], help="Cleaned Ref./Code/Quote tables (clean_and_split_codes output).")
+
+    search = commands.add_parser("search", help="Query the index.")
+    search.add_argument("query", help='Terms, "phrases" and pid:/ref:/code:/kind: filters.')
+    search.add_argument("--index", default="search_index", help="Index directory.")
+    search.add_argument("-k", type=int, default=10, help="Number of hits.")
+    for field in FILTER_FIELDS:
+        search.add_argument(f"--{field}", action="append", default=None, help=f"Only documents with this {field}.")
+    search.add_argument("--json", action="store_true", help="Print hits as JSON lines.")
+    args = parser.parse_args()
+
+    if args.command in ("build", "update"):
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+        start = time.perf_counter()
+        summary = update_index(args.index, getattr(args, "transcripts", ()), getattr(args, "table", ()),
+                               getattr(args, "start_with", None))
+        print(f"Indexed {summary['files_indexed']} files ({summary['files_unchanged']} unchanged, "
+              f"{summary['files_failed']} failed, {summary['files_removed']} removed), {summary['documents']} documents "
+              f"in {time.perf_counter() - start:.2f}s")
+        return
+
+    start = time.perf_counter()
+    index = SearchIndex(args.index)
+    filters = {field: getattr(args, field) for field in FILTER_FIELDS if getattr(args, field)}
+    hits = index.search(args.query, args.k, filters)
+    elapsed = (time.perf_counter() - start) * 1000
+    index.close()
+    for hit in hits:
+        print(json.dumps(hit, ensure_ascii=False) if args.json else format_hit(hit))
+    print(f"{len(hits)} hits in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()